@@ -0,0 +1,263 @@
+"""
+Render-path benchmarks for EmailCampaignBot
+
+Times templating, subject generation, attachment handling and MIME
+construction on synthetic contact lists, reports ops/sec and peak memory,
+and stores the results as JSON so runs can be compared:
+
+    python benchmark.py --sizes 1000 100000 --output before.json
+    python benchmark.py --sizes 1000 100000 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from email_campaign_bot import AttachmentCache, EmailCampaignBot, build_attachment_part
+
+
+FIRST_NAMES = ['John', 'Marie', 'Alex', 'Hans', 'Sofia', 'Luca', 'Emma', 'Pierre', 'Anna', 'Carlos']
+LAST_NAMES = ['Doe', 'Martin', 'Smith', 'Mueller', 'Rossi', 'Garcia', 'Dubois', 'Schmidt', 'Brown', 'Lopez']
+COMPANIES = ['TechCorp', 'InnovateFR', 'StartupXYZ', 'DataWorks', 'FinEdge', 'GreenGrid', 'MedNova', 'CloudNine']
+POSITIONS = ['CTO', 'Directeur Innovation', 'Founder', 'Head of Data', 'VP Engineering', 'Analyst', 'Partner']
+SOURCES = ['LinkedIn', 'Conference', 'Website', 'Referral', None]
+LANGUAGES = ['en', 'fr', 'en', 'en', 'fr', 'de']
+CUSTOM_MESSAGES = [
+    'I am particularly interested in your work on AI applications.',
+    'Votre expertise en innovation m\'intéresse beaucoup.',
+    'I would love to learn about your entrepreneurship journey.',
+    None
+]
+
+GLOBAL_VARS = {
+    'sender_name': 'Jane Sender',
+    'sender_title': 'Financial Engineering Student',
+    'sender_contact': 'jane@example.com | +1 555 0100',
+    'meeting_duration': '15-minute',
+    'call_to_action': 'Would you be open to a short call next week?',
+    'sender_name_fr': 'Jeanne Expéditrice'
+}
+
+# Row-wise benchmarks run over at most this many contacts per size
+DEFAULT_MAX_ITERATIONS = 20000
+
+# Uncached attachment encoding is slow by design: cap its iterations
+UNCACHED_ATTACHMENT_ITERATIONS = 500
+
+# Regression threshold: ops/sec drop (fraction) that gets flagged
+DEFAULT_THRESHOLD = 0.10
+
+
+def generate_contacts(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic contact list with the columns of the sample contacts file"""
+    rng = np.random.default_rng(seed)
+    first = rng.choice(FIRST_NAMES, rows)
+    last = rng.choice(LAST_NAMES, rows)
+    ids = np.arange(rows).astype(str)
+    return pd.DataFrame({
+        'name': pd.Series(first, dtype=object) + ' ' + pd.Series(last, dtype=object),
+        'email': pd.Series(np.char.lower(first), dtype=object) + '.' + ids + '@example.com',
+        'language': rng.choice(LANGUAGES, rows),
+        'company': rng.choice(COMPANIES, rows),
+        'position': rng.choice(POSITIONS, rows),
+        'source': pd.Series(SOURCES, dtype=object).iloc[rng.integers(0, len(SOURCES), rows)].to_numpy(),
+        'custom_message': pd.Series(CUSTOM_MESSAGES, dtype=object).iloc[rng.integers(0, len(CUSTOM_MESSAGES), rows)].to_numpy()
+    })
+
+
+def make_attachment(directory: str, size: int) -> str:
+    """Write a random binary attachment of the given size"""
+    path = os.path.join(directory, f"attachment_{size}.pdf")
+    with open(path, 'wb') as f:
+        f.write(np.random.default_rng(size).bytes(size))
+    return path
+
+
+def make_bot() -> EmailCampaignBot:
+    bot = EmailCampaignBot("bench@example.com", "unused", "localhost", 25)
+    templates_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_networking.json")
+    bot.load_templates_from_file(templates_file)
+    return bot
+
+
+def measure(run: Callable[[], int], track_memory: bool) -> Dict:
+    """Time run() (which returns its op count), then re-run it under tracemalloc for peak memory"""
+    start = time.perf_counter()
+    ops = run()
+    seconds = time.perf_counter() - start
+    result = {
+        'iterations': ops,
+        'seconds': round(seconds, 6),
+        'ops_per_sec': round(ops / seconds, 2) if seconds > 0 else None,
+        'peak_memory_bytes': None
+    }
+    if track_memory:
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def build_benchmarks(bot: EmailCampaignBot, contacts: pd.DataFrame, attachment_paths: List[str],
+                     max_iterations: int) -> Dict[str, Callable[[], int]]:
+    """Benchmark name -> callable returning the number of operations it performed"""
+    sample = contacts.head(max_iterations).to_dict('records')
+    template = bot.templates['en']
+
+    def personalize_message():
+        for contact in sample:
+            bot.personalize_message(template, contact, GLOBAL_VARS)
+        return len(sample)
+
+    def generate_subject():
+        for contact in sample:
+            bot.generate_subject(contact, contact['language'], GLOBAL_VARS)
+        return len(sample)
+
+    def render_batch():
+        bot.render_batch(contacts, GLOBAL_VARS)
+        return len(contacts)
+
+    def attachment_uncached():
+        iterations = min(len(sample), UNCACHED_ATTACHMENT_ITERATIONS)
+        for _ in range(iterations):
+            for path in attachment_paths:
+                build_attachment_part(path).as_bytes()
+        return iterations * len(attachment_paths)
+
+    def attachment_cached():
+        cache = AttachmentCache()
+        cache.pin(attachment_paths)
+        for _ in sample:
+            for path in attachment_paths:
+                for _ in cache.get(path).iter_chunks():
+                    pass
+        cache.clear()
+        return len(sample) * len(attachment_paths)
+
+    def mime_plain():
+        for contact in sample:
+            bot.build_message(contact['email'], "Subject", template).as_bytes()
+        return len(sample)
+
+    def mime_with_attachments():
+        bot.attachment_cache.pin(attachment_paths)
+        try:
+            for contact in sample:
+                bot.build_message(contact['email'], "Subject", template, attachment_paths).as_bytes()
+        finally:
+            bot.attachment_cache.clear()
+        return len(sample)
+
+    return {
+        'personalize_message': personalize_message,
+        'generate_subject': generate_subject,
+        'render_batch': render_batch,
+        'attachment_uncached': attachment_uncached,
+        'attachment_cached': attachment_cached,
+        'mime_plain': mime_plain,
+        'mime_with_attachments': mime_with_attachments
+    }
+
+
+def run_benchmarks(sizes: List[int], selected: List[str] = None, max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                   attachment_size: int = 200 * 1024, track_memory: bool = True) -> Dict:
+    """Run every benchmark for every contact list size"""
+    bot = make_bot()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="campaign_bench_") as directory:
+        attachment_paths = [make_attachment(directory, attachment_size)]
+        for rows in sizes:
+            print(f"\n📋 {rows:,} contacts")
+            contacts = generate_contacts(rows)
+            benchmarks = build_benchmarks(bot, contacts, attachment_paths, max_iterations)
+            for name, run in benchmarks.items():
+                if selected and name not in selected:
+                    continue
+                result = {'name': name, 'rows': rows, **measure(run, track_memory)}
+                results.append(result)
+                memory = result['peak_memory_bytes']
+                memory_text = f", peak {memory / 1024 / 1024:.1f} MB" if memory is not None else ""
+                print(f"   {name:<24} {result['ops_per_sec']:>14,.0f} ops/sec{memory_text}")
+
+    return {
+        'created': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'max_iterations': max_iterations,
+        'attachment_size': attachment_size,
+        'results': results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare two result sets by (benchmark, rows)
+
+    Returns:
+        The benchmarks whose ops/sec dropped by more than threshold
+    """
+    previous = {(r['name'], r['rows']): r for r in baseline.get('results', [])}
+    regressions = []
+    print(f"\n📊 Comparison with baseline from {baseline.get('created', 'unknown')}")
+    for result in current['results']:
+        before = previous.get((result['name'], result['rows']))
+        if not before or not before.get('ops_per_sec') or not result.get('ops_per_sec'):
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        flag = "❌" if change < -threshold else "✅"
+        print(f"{flag} {result['name']:<24} {result['rows']:>9,} rows  {change:+.1%}")
+        if change < -threshold:
+            regressions.append({**result, 'baseline_ops_per_sec': before['ops_per_sec'], 'change': round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EmailCampaignBot render path")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help="Contact list sizes to generate")
+    parser.add_argument('--only', nargs='+', help="Run only these benchmarks")
+    parser.add_argument('--max-iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help="Contacts processed by row-wise benchmarks per size")
+    parser.add_argument('--attachment-size', type=int, default=200 * 1024, help="Attachment size in bytes")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak memory pass")
+    parser.add_argument('--output', default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument('--compare', help="Baseline JSON results to flag regressions against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Ops/sec drop (fraction) reported as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.only, args.max_iterations, args.attachment_size,
+                             track_memory=not args.no_memory)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        results['regressions'] = regressions
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results saved to {args.output}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Background execution of email campaigns
+
+Campaigns run in a daemon thread so the Streamlit script never blocks on SMTP
+or pacing delays. Jobs are kept in a process-wide registry: a page refresh
+starts a new Streamlit session, which can reattach to a running job by id.
+Finished jobs are dropped from the registry after FINISHED_JOB_TTL seconds,
+and only the last MAX_FINISHED_JOBS of them are kept.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from email_campaign_bot import CampaignControl
+
+# Progress events kept for the UI between polls; the oldest are dropped beyond this
+EVENT_QUEUE_SIZE = 1000
+
+# Seconds a finished job stays available for reattaching
+FINISHED_JOB_TTL = 3600
+
+# Finished jobs kept in the registry (the most recently finished ones)
+MAX_FINISHED_JOBS = 10
+
+
+class CampaignJob:
+    """
+    A campaign running in a background thread
+
+    work(control, on_progress) does the actual sending and returns the
+    campaign results. Progress events are pushed to a bounded thread-safe
+    queue the UI drains with events() (if nobody drains it, the oldest
+    events are dropped); snapshot() gives the aggregated state for a UI that
+    (re)attaches mid-run.
+    """
+
+    def __init__(self, work: Callable, description: str = "", target: int = None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.description = description
+        self.target = target
+        self.control = CampaignControl()
+        self.status = 'running'
+        self.result = None
+        self.error = None
+        self.started_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.finished_clock = None  # time.monotonic() when the job finished
+        self.counts = {}
+        self.recent = deque(maxlen=50)
+        self.dropped_events = 0
+        self._events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, args=(work,), daemon=True,
+                                        name=f"campaign-{self.job_id}")
+
+    def start(self) -> 'CampaignJob':
+        self._thread.start()
+        return self
+
+    def _emit(self, event: Dict):
+        """Progress callback handed to the campaign; called from sending threads"""
+        event = dict(event, time=datetime.now().isoformat())
+        with self._lock:
+            if event.get('event') == 'delivery':
+                status = event.get('status')
+                self.counts[status] = self.counts.get(status, 0) + 1
+                self.recent.append(event)
+        self._push(event)
+
+    def _push(self, event: Dict):
+        """Queue an event for events(), dropping the oldest one when the queue is full"""
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()
+                    with self._lock:
+                        self.dropped_events += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self, work: Callable):
+        try:
+            self.result = work(self.control, self._emit)
+            self.status = 'cancelled' if self.control.cancelled else 'completed'
+        except Exception as e:
+            print(f"❌ Campaign job {self.job_id} failed: {e}")
+            self.error = str(e)
+            self.status = 'failed'
+        finally:
+            # finished_clock is set first: the registry prunes by it as soon as done is true
+            self.finished_clock = time.monotonic()
+            self.finished_at = datetime.now().isoformat()
+            self._push({'event': 'finished', 'status': self.status, 'time': self.finished_at})
+
+    @property
+    def done(self) -> bool:
+        return self.finished_clock is not None
+
+    @property
+    def state(self) -> str:
+        """running, paused, completed, cancelled or failed"""
+        if self.status == 'running' and self.control.paused:
+            return 'paused'
+        return self.status
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def cancel(self):
+        self.control.cancel()
+
+    def events(self) -> List[Dict]:
+        """Drain the progress events queued since the last call"""
+        drained = []
+        while True:
+            try:
+                drained.append(self._events.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def snapshot(self) -> Dict:
+        """Aggregated progress, independent of which events were already drained"""
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'description': self.description,
+                'target': self.target,
+                'state': self.state,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'counts': dict(self.counts),
+                'recent': list(self.recent),
+                'dropped_events': self.dropped_events,
+                'error': self.error
+            }
+
+
+_jobs: Dict[str, CampaignJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def _prune_jobs():
+    """Drop expired finished jobs and all but the last MAX_FINISHED_JOBS (call with _jobs_lock held)"""
+    now = time.monotonic()
+    finished = sorted((job for job in _jobs.values() if job.done), key=lambda job: job.finished_clock)
+    for i, job in enumerate(finished):
+        if now - job.finished_clock > FINISHED_JOB_TTL or i < len(finished) - MAX_FINISHED_JOBS:
+            del _jobs[job.job_id]
+
+
+def start_job(work: Callable, description: str = "", target: int = None) -> CampaignJob:
+    """
+    Start work(control, on_progress) in the background and register the job
+
+    target is the number of sends expected, used for progress display only.
+    """
+    job = CampaignJob(work, description, target)
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job.job_id] = job
+    return job.start()
+
+
+def get_job(job_id: str) -> Optional[CampaignJob]:
+    """Look up a job started by any session of this process (None once it has expired)"""
+    with _jobs_lock:
+        _prune_jobs()
+        return _jobs.get(job_id)
@@ -3,19 +3,2360 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+from email.policy import SMTP as SMTP_POLICY
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses, parseaddr
 import pandas as pd
+import numpy as np
+from openpyxl import load_workbook
 import time
 import random
 import os
 import mimetypes
+import mmap
+import base64
+import uuid
+import socket
+import sys
+import ssl
 from datetime import datetime
 import json
+import sqlite3
 import re
-from typing import Dict, List, Optional
+import queue
+import asyncio
+import heapq
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import tempfile
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import warnings
+import weakref
+from array import array
+from itertools import chain, repeat
+from collections import Counter, OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+
+class StageMetrics:
+    """
+    Timing histograms per campaign stage, plus send counters
+
+    Durations are kept per stage so summary() can report exact percentiles;
+    to_openmetrics() renders the same data as OpenMetrics histograms for
+    scraping (serve()) or a node-exporter style text file. Thread-safe.
+    """
+
+    STAGES = ['contact_load', 'validation', 'suppression', 'language_resolution', 'render', 'mime_build', 'connect', 'tls',
+              'login', 'envelope', 'data', 'pacing_wait']
+    BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+    CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+    def __init__(self, prefix: str = "email_campaign"):
+        self.prefix = prefix
+        self._samples = {stage: array('d') for stage in self.STAGES}
+        self._sends = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, array('d')).append(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Time the body of a with-block as one observation of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count_send(self, status: str):
+        with self._lock:
+            self._sends[status] += 1
+
+    def _snapshot(self) -> tuple:
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            return samples, dict(self._sends)
+
+    def summary(self) -> Dict:
+        """Per stage: count, total, p50, p95 and max seconds (stages never timed are omitted)"""
+        samples, _ = self._snapshot()
+        summary = {}
+        for stage, values in samples.items():
+            if not len(values):
+                continue
+            p50, p95 = np.percentile(values, [50, 95])
+            summary[stage] = {
+                'count': int(len(values)),
+                'total': round(float(values.sum()), 6),
+                'p50': round(float(p50), 6),
+                'p95': round(float(p95), 6),
+                'max': round(float(values.max()), 6)
+            }
+        return summary
+
+    def to_openmetrics(self) -> str:
+        """Render the histograms and send counters in OpenMetrics text format"""
+        samples, sends = self._snapshot()
+        name = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# TYPE {name} histogram",
+            f"# UNIT {name} seconds",
+            f"# HELP {name} Time spent in each campaign stage."
+        ]
+        for stage, values in samples.items():
+            values = np.sort(values)
+            for bound in self.BUCKETS:
+                count = int(np.searchsorted(values, bound, side='right'))
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{float(bound)}"}} {count}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {len(values)}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {len(values)}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {float(values.sum())}')
+        name = f"{self.prefix}_sends"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"# HELP {name} Send attempts by outcome.")
+        for status, count in sorted(sends.items()):
+            lines.append(f'{name}_total{{status="{status}"}} {count}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str):
+        """Write the metrics to a text file, replacing it atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_openmetrics())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the live metrics on http://host:port/metrics until the returned server is shut down"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_openmetrics().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', StageMetrics.CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="campaign-metrics").start()
+        print(f"📈 Metrics at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+def _timed(metrics: Optional[StageMetrics], stage: str):
+    """metrics.time(stage), or a no-op when no metrics are being collected"""
+    return metrics.time(stage) if metrics is not None else nullcontext()
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP sessions reused across sends"""
+
+    def __init__(self, smtp_server: str, smtp_port: int, email: str, password: str,
+                 max_size: int = 1, timeout: float = 60, health_check_interval: float = 15,
+                 use_tls: bool = True):
+        """
+        Initialize the SMTP connection pool
+
+        Args:
+            smtp_server: SMTP server address
+            smtp_port: SMTP server port
+            email: Login user
+            password: Login password
+            max_size: Maximum number of idle sessions kept open
+            timeout: Socket timeout for new sessions (seconds)
+            health_check_interval: Idle time after which a session is checked with NOOP before reuse
+            use_tls: Upgrade new sessions with STARTTLS before logging in
+        """
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.email = email
+        self.password = password
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.use_tls = use_tls
+        self.metrics = None  # StageMetrics for connect/TLS/login timings, set per campaign
+        self._idle = []  # (server, last_used) pairs
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open a new session: connect, STARTTLS and login"""
+        with _timed(self.metrics, 'connect'):
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                with _timed(self.metrics, 'tls'):
+                    server.starttls()
+            with _timed(self.metrics, 'login'):
+                server.login(self.email, self.password)
+        except Exception:
+            self._close_quietly(server)
+            raise
+        return server
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        """Health-check a session with NOOP"""
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _close_quietly(server: smtplib.SMTP):
+        """Close a session, ignoring errors from an already dead connection"""
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def acquire(self) -> smtplib.SMTP:
+        """Get a live session, reusing an idle one when possible"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.health_check_interval or self._is_alive(server):
+                return server
+            self._close_quietly(server)
+        return self._connect()
+
+    def release(self, server: smtplib.SMTP):
+        """Return a healthy session to the pool"""
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._close_quietly(server)
+
+    def discard(self, server: smtplib.SMTP):
+        """Drop a session that is broken or in an unknown state"""
+        self._close_quietly(server)
+
+    def close(self):
+        """Close all idle sessions"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close_quietly(server)
+
+
+# Contacts read per chunk when streaming a contacts file
+CONTACT_CHUNK_SIZE = 10000
+
+# Contacts rendered per batch while running a campaign
+RENDER_CHUNK_SIZE = 500
+
+# Raw bytes base64-encoded per chunk when streaming an attachment (a multiple of 57, one 76-char line)
+STREAM_CHUNK_SIZE = 57 * 1024
+
+# Campaign log rows kept in memory before they are spilled to disk
+LOG_SPILL_ROWS = 20000
+
+# Where profiled campaign runs save their .prof and allocation reports
+PROFILE_DIR = "campaign_profiles"
+
+# Contacts per task sent to the message builder processes (build_workers)
+BUILD_CHUNK_SIZE = 16
+
+# Bytes collected before each socket write of the DATA stream
+SEND_BUFFER_SIZE = 64 * 1024
+
+# How run_sharded_campaign assigns contacts to sender accounts
+SHARD_STRATEGIES = ['round_robin', 'weighted', 'domain']
+
+# Contact chunks read ahead for each account of a sharded campaign
+SHARD_QUEUE_CHUNKS = 2
+
+# Recipients per SMTP transaction in broadcast mode
+BROADCAST_BATCH_SIZE = 50
+
+# To header of broadcast messages; the recipients are only in the envelope (BCC-style)
+BROADCAST_TO = "undisclosed-recipients:;"
+
+# Template placeholders, e.g. {name}; other braces (CSS rules, JSON) are kept as literal text
+PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\}')
+
+# Fast path for address syntax: dot-atom local part and an ASCII domain with at least two labels;
+# addresses with non-ASCII characters are checked by email-validator instead
+_ATOM = r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+"
+_LABEL = r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+EMAIL_PATTERN = re.compile(rf"{_ATOM}(?:\.{_ATOM})*@(?:{_LABEL}\.)+(?:[A-Za-z]{{2,63}}|xn--[A-Za-z0-9-]{{1,59}})")
+
+# Global variables that can be overridden per language with a `<key>_<lang>` variant
+LANGUAGE_SPECIFIC_VARS = ['sender_name', 'sender_title', 'sender_contact', 'meeting_duration', 'call_to_action']
+
+
+def _format_value(value) -> Optional[str]:
+    """Convert a variable to its text form, None for missing values (None/NaN)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+class CompiledTemplate:
+    """Template split once into literal chunks and placeholder slots"""
+
+    __slots__ = ('parts', 'slots', 'placeholders')
+
+    def __init__(self, template: str):
+        # re.split with one group alternates literal, placeholder name, literal, ...
+        self.parts = PLACEHOLDER_PATTERN.split(template)
+        self.slots = [(i, self.parts[i]) for i in range(1, len(self.parts), 2)]
+        self.placeholders = {name for _, name in self.slots}
+
+    def render(self, context: Dict[str, Optional[str]], keep_missing: bool = False) -> str:
+        """
+        Fill placeholder slots from context in a single join
+
+        Args:
+            context: Placeholder name -> text (None means missing)
+            keep_missing: Keep unfilled placeholders as-is instead of removing them
+        """
+        parts = self.parts.copy()
+        for i, name in self.slots:
+            value = context.get(name)
+            if value is None:
+                value = f"{{{name}}}" if keep_missing else ""
+            parts[i] = value
+        return ''.join(parts)
+
+
+class TemplateRenderer:
+    """Render compiled templates with global variables resolved once per language"""
+
+    def __init__(self, global_vars: Dict = None):
+        self.global_vars = global_vars or {}
+        self._global_context = {key: _format_value(value) for key, value in self.global_vars.items()}
+        self._language_overrides = {}
+        self._plans = {}
+
+    def language_overrides(self, language) -> Dict[str, Optional[str]]:
+        """Language-specific sender variables (e.g. sender_name_fr), cached per language"""
+        overrides = self._language_overrides.get(language)
+        if overrides is None:
+            overrides = {}
+            for key in LANGUAGE_SPECIFIC_VARS:
+                lang_specific_key = f"{key}_{language}"
+                if lang_specific_key in self.global_vars:
+                    overrides[key] = self._global_context[lang_specific_key]
+            self._language_overrides[language] = overrides
+        return overrides
+
+    def _plan(self, template: CompiledTemplate, language) -> tuple:
+        """
+        Resolve everything about a template that does not depend on the contact
+
+        Returns:
+            (base context, placeholders a contact can fill), cached per template and language
+        """
+        key = (template, language)
+        plan = self._plans.get(key)
+        if plan is None:
+            overrides = self.language_overrides(language)
+            base = {name: self._global_context.get(name) for name in template.placeholders}
+            base.update((name, value) for name, value in overrides.items() if name in base)
+            contact_slots = tuple(name for name in template.placeholders if name not in overrides)
+            plan = self._plans[key] = (base, contact_slots)
+        return plan
+
+    def varying_placeholders(self, template: CompiledTemplate, language, columns, body: bool = True) -> set:
+        """Placeholders whose value can differ between contacts that have these columns"""
+        base, contact_slots = self._plan(template, language)
+        varying = {name for name in contact_slots if name in columns}
+        # Body only: an unset {source_info} is derived from each contact's source
+        if body and 'source_info' in template.placeholders and base['source_info'] is None and 'source' in columns:
+            varying.add('source_info')
+        return varying
+
+    def context(self, template: CompiledTemplate, contact_data: Dict, language) -> Dict[str, Optional[str]]:
+        """Placeholder values: language overrides > contact data > global variables"""
+        base, contact_slots = self._plan(template, language)
+        context = base.copy()
+        for name in contact_slots:
+            if name in contact_data:
+                context[name] = _format_value(contact_data[name])
+        return context
+
+    def render_message(self, template: CompiledTemplate, contact_data: Dict, language=None) -> str:
+        """Render an email body, removing unfilled placeholders"""
+        if language is None:
+            language = contact_data.get('language', 'en')
+        context = self.context(template, contact_data, language)
+        if 'source_info' in context and context['source_info'] is None:
+            source = _format_value(contact_data.get('source'))
+            context['source_info'] = f" on {source}" if source is not None else ""
+        return template.render(context)
+
+    def render_subject(self, template: CompiledTemplate, contact_data: Dict, language: str) -> str:
+        """Render a subject line, keeping unfilled placeholders visible"""
+        return template.render(self.context(template, contact_data, language), keep_missing=True)
+
+    def render_frame(self, template: CompiledTemplate, df: pd.DataFrame, language,
+                     keep_missing: bool = False) -> List[str]:
+        """
+        Render a template for every row of a DataFrame with column-wise operations
+
+        Equivalent to render_message (or render_subject with keep_missing=True)
+        applied row by row, but each placeholder column is converted to text once.
+        """
+        base, contact_slots = self._plan(template, language)
+        size = len(df)
+        values = {}
+        for name in template.placeholders:
+            missing = f"{{{name}}}" if keep_missing else ""
+            value = base[name] if base[name] is not None else missing
+            if name in contact_slots and name in df.columns:
+                column = df[name]
+                value = column.astype(str).where(column.notna(), missing)
+            values[name] = value
+
+        # Body only: {source_info} falls back to " on <source>" when not set explicitly
+        if 'source_info' in values and not keep_missing:
+            if 'source' in df.columns:
+                source = df['source']
+                derived = (" on " + source.astype(str)).where(source.notna(), "")
+            else:
+                derived = pd.Series("", index=df.index)
+            if 'source_info' in df.columns:
+                explicit = df['source_info']
+                values['source_info'] = explicit.astype(str).where(explicit.notna(), derived)
+            elif base['source_info'] is None:
+                values['source_info'] = derived
+
+        # Merge adjacent constant chunks so each row is a join over the varying columns only
+        sequences = []
+        constant = []
+        for i, part in enumerate(template.parts):
+            value = values[part] if i % 2 else part
+            if isinstance(value, str):
+                constant.append(value)
+            else:
+                if constant:
+                    sequences.append(repeat(''.join(constant), size))
+                    constant = []
+                sequences.append(value.tolist())
+        if constant:
+            sequences.append(repeat(''.join(constant), size))
+        return [''.join(row) for row in zip(*sequences)]
+
+
+def _attachment_type(file_path: str) -> tuple:
+    """Guess (main type, sub type) for an attachment file"""
+    content_type, encoding = mimetypes.guess_type(file_path)
+    if content_type is None or encoding is not None:
+        content_type = 'application/octet-stream'
+    return tuple(content_type.split('/', 1))
+
+
+def build_attachment_part(file_path: str) -> MIMEBase:
+    """Read and encode a file as a MIME attachment part"""
+    main_type, sub_type = _attachment_type(file_path)
+    filename = os.path.basename(file_path)
+
+    if main_type == 'text':
+        with open(file_path, 'r', encoding='utf-8') as fp:
+            attachment = MIMEText(fp.read(), _subtype=sub_type)
+    else:
+        with open(file_path, 'rb') as fp:
+            attachment = MIMEBase(main_type, sub_type)
+            attachment.set_payload(fp.read())
+            encoders.encode_base64(attachment)
+
+    attachment.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+    return attachment
+
+
+class EncodedAttachment:
+    """Attachment part already serialized to wire bytes (headers and encoded body)"""
+
+    __slots__ = ('data', 'dot_safe')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        # No line starts with '.' (always true for base64 bodies): sent without dot-stuffing
+        self.dot_safe = not data.startswith(b'.') and b'\n.' not in data
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'EncodedAttachment':
+        return cls(build_attachment_part(file_path).as_bytes(policy=SMTP_POLICY))
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def iter_chunks(self):
+        # Slices of the cached bytes, so sending never copies the whole part
+        view = memoryview(self.data)
+        for start in range(0, len(view), SEND_BUFFER_SIZE):
+            yield view[start:start + SEND_BUFFER_SIZE]
+
+
+class MappedAttachment:
+    """
+    Attachment streamed from a memory-mapped file
+
+    The file is base64-encoded in fixed-size chunks while the message is
+    written, so only one chunk of encoded data is in memory at a time.
+    """
+
+    __slots__ = ('file_path', 'headers')
+
+    # Headers and base64 lines never start with '.'
+    dot_safe = True
+
+    def __init__(self, file_path: str):
+        main_type, sub_type = _attachment_type(file_path)
+        part = MIMEBase(main_type, sub_type, policy=SMTP_POLICY)
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(file_path))
+        self.file_path = file_path
+        self.headers = b''.join(SMTP_POLICY.fold_binary(name, value) for name, value in part.items()) + b'\r\n'
+
+    def iter_chunks(self):
+        yield self.headers
+        with open(self.file_path, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # 57 raw bytes per 76-character line, so chunks never split a line
+                for start in range(0, len(mapped), STREAM_CHUNK_SIZE):
+                    encoded = base64.encodebytes(mapped[start:start + STREAM_CHUNK_SIZE])
+                    yield encoded.replace(b'\n', b'\r\n')
+
+
+class OutgoingMessage:
+    """
+    A message ready for the wire: envelope plus MIME content as byte chunks
+
+    Segments are bytes or attachment objects; iterating the chunks never
+    materializes the whole message unless as_bytes() is called.
+    """
+
+    __slots__ = ('sender', 'recipients', 'segments')
+
+    def __init__(self, sender: str, recipients: List[str], segments: List):
+        self.sender = sender
+        self.recipients = recipients
+        self.segments = segments
+
+    def iter_chunks(self):
+        for segment in self.segments:
+            if isinstance(segment, bytes):
+                yield segment
+            else:
+                yield from segment.iter_chunks()
+
+    def as_bytes(self) -> bytes:
+        return b''.join(self.iter_chunks())
+
+
+def message_segments(sender: str, recipient: str, subject: str, body: str, attachments: List[str],
+                     get_attachment: Callable) -> tuple:
+    """
+    MIME segments of a message: headers, HTML body and one part per attachment
+
+    Args:
+        get_attachment: Maps a file path to its attachment segment, None if
+            the file does not exist (e.g. AttachmentCache.get)
+
+    Returns:
+        (segments, paths of the attachments that were not found)
+    """
+    boundary = f"==============={uuid.uuid4().hex}=="
+    msg = MIMEMultipart(boundary=boundary, policy=SMTP_POLICY)
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    headers = b''.join(SMTP_POLICY.fold_binary(name, value) for name, value in msg.items())
+
+    # Body part, then one part per attachment between boundary delimiters
+    delimiter = f"\r\n--{boundary}\r\n".encode('ascii')
+    segments = [headers, b'\r\n', delimiter[2:], MIMEText(body, 'html').as_bytes(policy=SMTP_POLICY)]
+
+    missing = []
+    for file_path in attachments or []:
+        attachment = get_attachment(file_path)
+        if attachment is None:
+            missing.append(file_path)
+            continue
+        segments.append(delimiter)
+        segments.append(attachment)
+
+    segments.append(f"\r\n--{boundary}--\r\n".encode('ascii'))
+    return segments, missing
+
+
+# Attachment cache of a message builder process (see EmailCampaignBot._iter_built)
+_builder_cache = None
+
+
+def _init_builder(pinned: List[str], max_bytes: int, stream_threshold: int):
+    global _builder_cache
+    _builder_cache = AttachmentCache(max_bytes, stream_threshold)
+    _builder_cache.pin(pinned)
+
+
+def _builder_attachment(file_path: str):
+    """Encode a per-contact attachment; shared and streamed ones stay paths for the sending process"""
+    if file_path in _builder_cache.pinned_paths:
+        return file_path if os.path.exists(file_path) else None
+    attachment = _builder_cache.get(file_path)
+    return file_path if isinstance(attachment, MappedAttachment) else attachment
+
+
+def _build_messages(sender: str, rows: List[tuple]) -> List[tuple]:
+    """
+    Build (recipient, subject, body, attachments) rows in a builder process
+
+    Returns:
+        (segments, missing attachments, build seconds) per row; segments are
+        bytes, except for the paths of shared and streamed attachments
+    """
+    built = []
+    for recipient, subject, body, attachments in rows:
+        start = time.perf_counter()
+        segments, missing = message_segments(sender, recipient, subject, body, attachments, _builder_attachment)
+        wire = []
+        buffer = bytearray()
+        for segment in segments:
+            if isinstance(segment, str):
+                wire.append(bytes(buffer))
+                wire.append(segment)
+                buffer.clear()
+            elif isinstance(segment, bytes):
+                buffer += segment
+            else:
+                for chunk in segment.iter_chunks():
+                    buffer += chunk
+        wire.append(bytes(buffer))
+        built.append((wire, missing, time.perf_counter() - start))
+    return built
+
+
+def _dot_stuff(message: OutgoingMessage):
+    """
+    The DATA stream of a message, with lines starting with '.' escaped chunk by chunk
+
+    Attachment parts without such lines (dot_safe, e.g. base64 bodies) pass
+    through as they are, without being copied.
+    """
+    at_line_start = True
+    for segment in message.segments:
+        if isinstance(segment, bytes):
+            chunks, stuff = (segment,), True
+        else:
+            chunks, stuff = segment.iter_chunks(), not getattr(segment, 'dot_safe', False)
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if stuff:
+                chunk = bytes(chunk)
+                stuffed = chunk.replace(b'\n.', b'\n..')
+                if at_line_start and chunk.startswith(b'.'):
+                    stuffed = b'.' + stuffed
+            else:
+                stuffed = chunk
+            at_line_start = chunk[-1:] == b'\n'
+            yield stuffed
+    if not at_line_start:
+        yield b'\r\n'
+
+
+def _data_writes(message: OutgoingMessage):
+    """
+    Socket writes for the DATA stream of a message, ending with the terminator
+
+    Small segments (headers, boundaries) are coalesced up to SEND_BUFFER_SIZE and
+    the terminator rides on the last write: separate small writes stall on Nagle +
+    delayed ACK. Chunks of SEND_BUFFER_SIZE or more are written as they are.
+    """
+    buffer = bytearray()
+    for chunk in _dot_stuff(message):
+        if buffer and len(buffer) + len(chunk) > SEND_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+        if len(chunk) >= SEND_BUFFER_SIZE:
+            yield chunk
+        else:
+            buffer += chunk
+    buffer += b'.\r\n'
+    yield bytes(buffer)
+
+
+def send_streaming(server: smtplib.SMTP, message: OutgoingMessage, metrics: StageMetrics = None):
+    """
+    Send a message over an open session, writing the DATA stream chunk by chunk
+
+    Mirrors smtplib.SMTP.sendmail error handling: raises SMTPSenderRefused,
+    SMTPRecipientsRefused (when every recipient is refused) or SMTPDataError,
+    and returns the dict of refused recipients otherwise. With metrics, the
+    envelope (MAIL/RCPT) and DATA phases are timed separately.
+    """
+    envelope_start = time.perf_counter()
+    server.ehlo_or_helo_if_needed()
+    mail_options = []
+    if not all(address.isascii() for address in [message.sender, *message.recipients]):
+        if server.has_extn('smtputf8'):
+            mail_options = ['SMTPUTF8', 'BODY=8BITMIME']
+
+    if len(message.recipients) > 1 and server.has_extn('pipelining'):
+        # RFC 2920: MAIL and every RCPT in one write, then read the replies in order
+        options = ''.join(f" {option}" for option in mail_options)
+        commands = [f"mail FROM:{smtplib.quoteaddr(message.sender)}{options}\r\n"]
+        commands.extend(f"rcpt TO:{smtplib.quoteaddr(recipient)}\r\n" for recipient in message.recipients)
+        server.send(''.join(commands))
+        (code, resp), *rcpt_replies = [server.getreply() for _ in commands]
+    else:
+        code, resp = server.mail(message.sender, mail_options)
+        rcpt_replies = None
+    if code != 250:
+        _abort_transaction(server, code)
+        raise smtplib.SMTPSenderRefused(code, resp, message.sender)
+
+    refused = {}
+    for position, recipient in enumerate(message.recipients):
+        code, resp = rcpt_replies[position] if rcpt_replies else server.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, resp)
+        if code == 421:
+            _abort_transaction(server, code)
+            raise smtplib.SMTPRecipientsRefused(refused)
+    if len(refused) == len(message.recipients):
+        _abort_transaction(server, code)
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    data_start = time.perf_counter()
+    if metrics is not None:
+        metrics.observe('envelope', data_start - envelope_start)
+    server.putcmd('data')
+    code, resp = server.getreply()
+    if code != 354:
+        _abort_transaction(server, code)
+        raise smtplib.SMTPDataError(code, resp)
+
+    for data in _data_writes(message):
+        server.send(data)
+    code, resp = server.getreply()
+    if metrics is not None:
+        metrics.observe('data', time.perf_counter() - data_start)
+    if code != 250:
+        _abort_transaction(server, code)
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+def _abort_transaction(server: smtplib.SMTP, code: int):
+    """Reset the session after a refused command (close it on 421, like smtplib)"""
+    if code == 421:
+        server.close()
+    else:
+        server._rset()
+
+
+class AsyncSMTPSession:
+    """
+    One SMTP session on asyncio streams, used by run_campaign_async
+
+    Speaks the subset of SMTP the pooled smtplib sessions use: EHLO,
+    STARTTLS, AUTH PLAIN/LOGIN, a pipelined envelope when the server offers
+    PIPELINING and the DATA stream in SEND_BUFFER_SIZE writes. Failures are
+    raised as the smtplib exceptions, so classify_smtp_error applies as is.
+    """
+
+    def __init__(self, host: str, port: int, email: str, password: str, use_tls: bool = True,
+                 timeout: float = 60, local_hostname: str = None):
+        self.host = host
+        self.port = port
+        self.email = email
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.local_hostname = local_hostname or socket.getfqdn()
+        self.features = {}
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, metrics: StageMetrics = None):
+        """Open the session: connect, STARTTLS and login"""
+        try:
+            with _timed(metrics, 'connect'):
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout)
+                code, resp = await self._reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, resp)
+            await self._ehlo()
+            if self.use_tls:
+                with _timed(metrics, 'tls'):
+                    await self._starttls()
+            with _timed(metrics, 'login'):
+                await self._login()
+        except BaseException:
+            self.close()
+            raise
+
+    async def _reply(self) -> tuple:
+        """Read a (possibly multi-line) reply: (code, text)"""
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            if not line:
+                self.close()
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            lines.append(line[4:].strip())
+            if line[3:4] != b'-':
+                break
+        try:
+            code = int(line[:3])
+        except ValueError:
+            code = -1
+        return code, b'\n'.join(lines)
+
+    async def _write(self, data: bytes):
+        if self._writer is None:
+            raise smtplib.SMTPServerDisconnected("please run connect() first")
+        self._writer.write(data)
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+
+    async def command(self, line: str) -> tuple:
+        """Send one command and read its reply"""
+        await self._write(f"{line}\r\n".encode('utf-8'))
+        return await self._reply()
+
+    async def _ehlo(self):
+        code, resp = await self.command(f"EHLO {self.local_hostname}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, resp)
+        self.features = {}
+        for line in resp.decode('latin-1').split('\n')[1:]:
+            name, _, value = line.partition(' ')
+            self.features[name.lower()] = value.strip()
+
+    async def _starttls(self):
+        if 'starttls' not in self.features:
+            raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+        code, resp = await self.command("STARTTLS")
+        if code != 220:
+            raise smtplib.SMTPResponseException(code, resp)
+        # Same as smtplib.starttls() without a context: encrypted, certificate not verified
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        await self._writer.start_tls(context, server_hostname=self.host)
+        await self._ehlo()
+
+    async def _login(self):
+        if 'auth' not in self.features:
+            raise smtplib.SMTPNotSupportedError("SMTP AUTH extension not supported by server.")
+        mechanisms = self.features['auth'].upper().split()
+
+        def b64(text):
+            return base64.b64encode(text.encode('utf-8')).decode('ascii')
+
+        if 'PLAIN' in mechanisms:
+            credentials = b64('\0' + self.email + '\0' + self.password)
+            code, resp = await self.command(f"AUTH PLAIN {credentials}")
+        elif 'LOGIN' in mechanisms:
+            code, resp = await self.command(f"AUTH LOGIN {b64(self.email)}")
+            if code == 334:
+                code, resp = await self.command(b64(self.password))
+        else:
+            raise smtplib.SMTPException("No suitable authentication method found.")
+        if code not in (235, 503):
+            raise smtplib.SMTPAuthenticationError(code, resp)
+
+    async def _abort_transaction(self, code: int):
+        """Reset the session after a refused command (close it on 421, like smtplib)"""
+        if code == 421:
+            self.close()
+        else:
+            await self.command("RSET")
+
+    async def send(self, message: OutgoingMessage, metrics: StageMetrics = None) -> Dict:
+        """
+        Send a message, writing the DATA stream chunk by chunk
+
+        Same contract as send_streaming: raises SMTPSenderRefused,
+        SMTPRecipientsRefused (when every recipient is refused) or
+        SMTPDataError, and returns the dict of refused recipients otherwise.
+        """
+        envelope_start = time.perf_counter()
+        options = ''
+        if not all(address.isascii() for address in [message.sender, *message.recipients]):
+            if 'smtputf8' in self.features:
+                options = ' SMTPUTF8 BODY=8BITMIME'
+
+        commands = [f"MAIL FROM:{smtplib.quoteaddr(message.sender)}{options}\r\n"]
+        commands.extend(f"RCPT TO:{smtplib.quoteaddr(recipient)}\r\n" for recipient in message.recipients)
+        if len(message.recipients) > 1 and 'pipelining' in self.features:
+            # RFC 2920: MAIL and every RCPT in one write, then read the replies in order
+            await self._write(''.join(commands).encode('utf-8'))
+            replies = [await self._reply() for _ in commands]
+        else:
+            replies = []
+            for command in commands:
+                await self._write(command.encode('utf-8'))
+                replies.append(await self._reply())
+                if replies[0][0] != 250 or replies[-1][0] == 421:
+                    break
+        (code, resp), *rcpt_replies = replies
+        if code != 250:
+            await self._abort_transaction(code)
+            raise smtplib.SMTPSenderRefused(code, resp, message.sender)
+
+        refused = {}
+        for recipient, (code, resp) in zip(message.recipients, rcpt_replies):
+            if code not in (250, 251):
+                refused[recipient] = (code, resp)
+            if code == 421:
+                await self._abort_transaction(code)
+                raise smtplib.SMTPRecipientsRefused(refused)
+        if len(refused) == len(message.recipients):
+            await self._abort_transaction(code)
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+        data_start = time.perf_counter()
+        if metrics is not None:
+            metrics.observe('envelope', data_start - envelope_start)
+        code, resp = await self.command("DATA")
+        if code != 354:
+            await self._abort_transaction(code)
+            raise smtplib.SMTPDataError(code, resp)
+
+        for data in _data_writes(message):
+            await self._write(data)
+        code, resp = await self._reply()
+        if metrics is not None:
+            metrics.observe('data', time.perf_counter() - data_start)
+        if code != 250:
+            await self._abort_transaction(code)
+            raise smtplib.SMTPDataError(code, resp)
+        return refused
+
+    async def quit(self):
+        """Say QUIT and close, ignoring errors from an already dead connection"""
+        try:
+            await self.command("QUIT")
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+            pass
+        self.close()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class AsyncSMTPPool:
+    """
+    Idle AsyncSMTPSession objects reused across sends
+
+    Not thread-safe: the pool belongs to one event loop. The number of open
+    sessions is bounded by the callers (run_campaign_async holds a semaphore).
+    """
+
+    def __init__(self, smtp_server: str, smtp_port: int, email: str, password: str, use_tls: bool = True,
+                 timeout: float = 60, metrics: StageMetrics = None):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.email = email
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.metrics = metrics
+        self.local_hostname = socket.getfqdn()
+        self._idle = []
+
+    async def acquire(self) -> AsyncSMTPSession:
+        """Get an idle session or open a new one"""
+        if self._idle:
+            return self._idle.pop()
+        session = AsyncSMTPSession(self.smtp_server, self.smtp_port, self.email, self.password,
+                                   self.use_tls, self.timeout, self.local_hostname)
+        await session.connect(self.metrics)
+        return session
+
+    async def send(self, message: OutgoingMessage) -> Dict:
+        """Send over a pooled session, reconnecting once on 421/disconnect (like SMTPTransport)"""
+        for attempt in range(2):
+            session = await self.acquire()
+            try:
+                refused = await session.send(message, self.metrics)
+            except smtplib.SMTPRecipientsRefused as e:
+                if any(code == 421 for code, _ in e.recipients.values()):
+                    session.close()
+                else:
+                    # The transaction was reset, the session is still usable
+                    self._idle.append(session)
+                raise
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                session.close()
+                reconnectable = (isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError))
+                                 or getattr(e, 'smtp_code', None) == 421)
+                if attempt or not reconnectable:
+                    raise
+                print(f"🔄 SMTP session lost ({e}), reconnecting...")
+            except BaseException:
+                # Includes cancellation mid-transaction: the session state is unknown
+                session.close()
+                raise
+            else:
+                self._idle.append(session)
+                return refused
+
+    async def close(self):
+        """QUIT all idle sessions"""
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(session.quit() for session in idle))
+
+
+class Transport:
+    """
+    Delivery backend behind EmailCampaignBot.send_email
+
+    send() takes a fully built OutgoingMessage and raises on failure; with
+    several recipients it returns the ones that were refused ({} or None if
+    none were). Backends must be safe to call from several sending threads.
+    """
+
+    # Verb used in the per-recipient status line
+    action = "sent"
+
+    def __init__(self):
+        self.concurrency = 1
+
+    def send(self, message: OutgoingMessage):
+        raise NotImplementedError
+
+    def set_concurrency(self, workers: int) -> int:
+        """Size the backend for this many concurrent senders, returning the previous value"""
+        previous, self.concurrency = self.concurrency, workers
+        return previous
+
+    def close(self):
+        """Release resources held between sends (called at the end of a campaign)"""
+
+
+class SMTPTransport(Transport):
+    """Deliver over pooled SMTP sessions, reconnecting once on 421/disconnect"""
+
+    def __init__(self, pool: SMTPConnectionPool):
+        super().__init__()
+        self.pool = pool
+
+    def send(self, message: OutgoingMessage) -> Dict:
+        for attempt in range(2):
+            server = self.pool.acquire()
+            try:
+                refused = send_streaming(server, message, self.pool.metrics)
+            except smtplib.SMTPRecipientsRefused as e:
+                if any(code == 421 for code, _ in e.recipients.values()):
+                    self.pool.discard(server)
+                else:
+                    # The transaction was reset, the session is still usable
+                    self.pool.release(server)
+                raise
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                self.pool.discard(server)
+                reconnectable = (isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError))
+                                 or getattr(e, 'smtp_code', None) == 421)
+                if attempt or not reconnectable:
+                    raise
+                print(f"🔄 SMTP session lost ({e}), reconnecting...")
+            except Exception:
+                self.pool.discard(server)
+                raise
+            else:
+                self.pool.release(server)
+                return refused
+
+    def set_concurrency(self, workers: int) -> int:
+        previous, self.pool.max_size = self.pool.max_size, workers
+        return previous
+
+    def close(self):
+        self.pool.close()
+
+
+class NullTransport(Transport):
+    """Produce every byte of the message, then discard it (test mode, benchmarks)"""
+
+    action = "built"
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.stats = {'messages': 0, 'bytes': 0}
+
+    def send(self, message: OutgoingMessage):
+        size = sum(len(chunk) for chunk in message.iter_chunks())
+        with self._lock:
+            self.stats['messages'] += 1
+            self.stats['bytes'] += size
+
+
+class SpooledFile:
+    """A spooled .eml file used as a message segment, read back in blocks from offset"""
+
+    __slots__ = ('path', 'offset')
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+
+    def iter_chunks(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                block = f.read(SEND_BUFFER_SIZE)
+                if not block:
+                    return
+                yield block
+
+
+class SpoolTransport(Transport):
+    """
+    Write each message as a complete .eml file into a maildir-style spool
+
+    Files are written to <directory>/tmp and renamed into <directory>/new once
+    complete, so a flush never picks up a partial message. The envelope is
+    stored in leading X-Envelope-From/X-Envelope-To lines, which flush()
+    strips before sending the message through another transport.
+    """
+
+    action = "spooled"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        for sub_directory in ('tmp', 'new', 'cur'):
+            os.makedirs(os.path.join(directory, sub_directory), exist_ok=True)
+        self._host = socket.gethostname().replace('/', '_').replace(':', '_')
+
+    def send(self, message: OutgoingMessage):
+        # Maildir-style unique name; the nanosecond time prefix keeps spool order
+        name = f"{time.time_ns()}.{uuid.uuid4().hex}.{self._host}.eml"
+        tmp_path = os.path.join(self.directory, 'tmp', name)
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(f"X-Envelope-From: {message.sender}\r\n"
+                        f"X-Envelope-To: {', '.join(message.recipients)}\r\n".encode('utf-8'))
+                for chunk in message.iter_chunks():
+                    f.write(chunk)
+            os.replace(tmp_path, os.path.join(self.directory, 'new', name))
+        except Exception:
+            _remove_quietly(tmp_path)
+            raise
+
+    def pending(self) -> List[str]:
+        """Spooled messages not flushed yet, oldest first"""
+        new_directory = os.path.join(self.directory, 'new')
+        return [os.path.join(new_directory, name) for name in sorted(os.listdir(new_directory))
+                if name.endswith('.eml')]
+
+    @staticmethod
+    def read_envelope(path: str) -> tuple:
+        """
+        Envelope of a spooled message
+
+        Returns:
+            (sender, recipients, offset of the message after the envelope lines);
+            files without envelope lines fall back to the From/To/Cc headers
+        """
+        header_lines = []
+        envelope = {}
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if line in (b'\r\n', b'\n'):
+                    break
+                name, _, value = line.partition(b':')
+                if not header_lines and name in (b'X-Envelope-From', b'X-Envelope-To'):
+                    envelope[name] = value.decode('utf-8').strip()
+                    offset += len(line)
+                else:
+                    header_lines.append(line)
+        if b'X-Envelope-To' in envelope:
+            recipients = [address.strip() for address in envelope[b'X-Envelope-To'].split(',') if address.strip()]
+            return envelope.get(b'X-Envelope-From', ''), recipients, offset
+        headers = BytesHeaderParser(policy=SMTP_POLICY).parsebytes(b''.join(header_lines))
+        sender = parseaddr(str(headers.get('From', '')))[1]
+        recipients = [address for _, address in
+                      getaddresses([str(value) for value in headers.get_all('To', []) + headers.get_all('Cc', [])])
+                      if address]
+        return sender, recipients, offset
+
+    def flush(self, transport: Transport, rate_limiter: 'RateLimiter' = None, keep: bool = False) -> Dict:
+        """
+        Send every pending spooled message through another transport
+
+        Args:
+            transport: Transport to deliver with (e.g. an SMTPTransport)
+            rate_limiter: Pacing for the sends (none by default)
+            keep: Move sent files to cur/ instead of deleting them
+
+        Returns:
+            Counts of sent and failed messages; failed ones stay in new/
+        """
+        counts = {'sent': 0, 'failed': 0}
+        try:
+            for path in self.pending():
+                if rate_limiter is not None and not rate_limiter.acquire():
+                    print(f"🛑 Daily sending quota of {rate_limiter.per_day} reached")
+                    break
+                try:
+                    sender, recipients, offset = self.read_envelope(path)
+                    refused = transport.send(OutgoingMessage(sender, recipients, [SpooledFile(path, offset)]))
+                    if refused:
+                        print(f"⚠️ Refused recipients in {os.path.basename(path)}: {', '.join(refused)}")
+                except Exception as e:
+                    print(f"❌ Error sending spooled message {os.path.basename(path)}: {e}")
+                    counts['failed'] += 1
+                    continue
+                if keep:
+                    os.replace(path, os.path.join(self.directory, 'cur', os.path.basename(path)))
+                else:
+                    os.remove(path)
+                counts['sent'] += 1
+                print(f"✅ Spooled message sent to {', '.join(recipients)}")
+        finally:
+            transport.close()
+        return counts
+
+
+class AttachmentCache:
+    """
+    Encoded attachments shared across the messages of a campaign
+
+    Pinned files (common and per-language attachments) are encoded once and
+    kept for the whole campaign. Other files (per-contact attachments) go
+    into an LRU keyed by path, mtime and size, bounded by max_bytes of
+    encoded data. Per-contact files larger than stream_threshold are not
+    cached but streamed from disk on every send.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, stream_threshold: int = 4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stream_threshold = stream_threshold
+        self._pinned_paths = set()
+        self._pinned = {}  # path -> EncodedAttachment
+        self._lru = OrderedDict()  # (path, mtime_ns, size) -> EncodedAttachment
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'streamed': 0}
+
+    def pin(self, paths: Iterable[str]):
+        """Mark files shared by every message of the campaign"""
+        with self._lock:
+            self._pinned_paths.update(paths)
+
+    @property
+    def pinned_paths(self) -> frozenset:
+        with self._lock:
+            return frozenset(self._pinned_paths)
+
+    def get(self, file_path: str):
+        """Get the attachment for a file (encoded or streamed), None if the file does not exist"""
+        with self._lock:
+            attachment = self._pinned.get(file_path)
+            if attachment is not None:
+                self.stats['hits'] += 1
+                return attachment
+            pinned = file_path in self._pinned_paths
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        if not pinned and stat.st_size > self.stream_threshold and _attachment_type(file_path)[0] != 'text':
+            with self._lock:
+                self.stats['streamed'] += 1
+            return MappedAttachment(file_path)
+
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        if not pinned:
+            with self._lock:
+                attachment = self._lru.get(key)
+                if attachment is not None:
+                    self._lru.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return attachment
+
+        # Encode outside the lock; concurrent misses on the same file are harmless
+        attachment = EncodedAttachment.from_file(file_path)
+        with self._lock:
+            self.stats['misses'] += 1
+            if pinned:
+                self._pinned[file_path] = attachment
+            else:
+                self._store(key, attachment)
+        return attachment
+
+    def _store(self, key: tuple, attachment: EncodedAttachment):
+        """Insert into the LRU, evicting least recently used entries over budget"""
+        if attachment.size > self.max_bytes or key in self._lru:
+            return
+        self._lru[key] = attachment
+        self._lru_bytes += attachment.size
+        while self._lru_bytes > self.max_bytes:
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= evicted.size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """Drop all cached attachments and pins, e.g. at the end of a campaign"""
+        with self._lock:
+            self._pinned_paths.clear()
+            self._pinned.clear()
+            self._lru.clear()
+            self._lru_bytes = 0
+            self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'streamed': 0}
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class CampaignLog:
+    """
+    Append-only, columnar log of send attempts
+
+    Columns are kept in typed arrays with status and languages stored as
+    category codes, which costs a fraction of a dict per row. Past spill_rows
+    buffered rows are appended to a CSV file, so memory stays bounded however
+    long the campaign is. Rows are only turned back into DataFrames on
+    demand (iter_frames/to_frame).
+    """
+
+    COLUMNS = ['timestamp', 'name', 'email', 'language', 'original_language',
+               'subject', 'attachments_count', 'template_used', 'status', 'attempts', 'smtp_code', 'error']
+    CATEGORICAL = ['language', 'original_language', 'status']
+    TEXT = ['name', 'email', 'subject', 'error']
+
+    def __init__(self, spill_rows: int = LOG_SPILL_ROWS, spill_path: str = None):
+        """
+        Initialize the log
+
+        Args:
+            spill_rows: Rows buffered in memory before spilling to disk
+            spill_path: CSV file to spill to (defaults to a temporary file that
+                is removed together with the log)
+        """
+        self.spill_rows = spill_rows
+        self.spill_path = spill_path
+        self._spilled = 0
+        self._categories = {column: {} for column in self.CATEGORICAL}
+        self._reset()
+
+    def _reset(self):
+        self._timestamps = array('d')
+        self._text = {column: [] for column in self.TEXT}
+        self._codes = {column: array('i') for column in self.CATEGORICAL}
+        self._attachments = array('i')
+        self._template_used = array('b')
+        self._attempts = array('i')
+        self._smtp_codes = array('i')  # 0 = no SMTP reply
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._timestamps)
+
+    def append(self, entry: Dict):
+        """Add one log entry (a dict with the COLUMNS keys; timestamp as a datetime or ISO string)"""
+        timestamp = entry['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        self._timestamps.append(timestamp.timestamp())
+        for column in self.TEXT:
+            self._text[column].append(_format_value(entry.get(column)))
+        for column in self.CATEGORICAL:
+            value = _format_value(entry.get(column))
+            codes = self._categories[column]
+            if value is None:
+                self._codes[column].append(-1)
+            else:
+                self._codes[column].append(codes.setdefault(value, len(codes)))
+        self._attachments.append(entry.get('attachments_count', 0))
+        self._template_used.append(bool(entry.get('template_used')))
+        self._attempts.append(entry.get('attempts', 1))
+        smtp_code = entry.get('smtp_code')
+        self._smtp_codes.append(int(smtp_code) if pd.notna(smtp_code) else 0)
+
+        if len(self._timestamps) >= self.spill_rows:
+            self._spill()
+
+    def _buffer_frame(self) -> pd.DataFrame:
+        columns = {
+            'timestamp': [datetime.fromtimestamp(ts).isoformat() for ts in self._timestamps],
+            'attachments_count': np.array(self._attachments, dtype=np.int32),
+            'template_used': np.array(self._template_used, dtype=bool),
+            'attempts': np.array(self._attempts, dtype=np.int32)
+        }
+        codes = np.array(self._smtp_codes, dtype=np.int32)
+        columns['smtp_code'] = pd.arrays.IntegerArray(codes, codes == 0)
+        columns.update(self._text)
+        for column in self.CATEGORICAL:
+            columns[column] = pd.Categorical.from_codes(np.array(self._codes[column], dtype=np.int32),
+                                                        categories=list(self._categories[column]))
+        return pd.DataFrame(columns, columns=self.COLUMNS)
+
+    def _spill(self):
+        if self.spill_path is None:
+            fd, self.spill_path = tempfile.mkstemp(prefix='campaign_log_', suffix='.csv')
+            os.close(fd)
+            weakref.finalize(self, _remove_quietly, self.spill_path)
+        self._buffer_frame().to_csv(self.spill_path, mode='a', header=self._spilled == 0, index=False)
+        self._spilled += len(self._timestamps)
+        self._reset()
+
+    def iter_frames(self, chunk_size: int = LOG_SPILL_ROWS):
+        """Yield the log as DataFrames, spilled rows first"""
+        if self._spilled:
+            dtypes = dict.fromkeys(self.TEXT + ['timestamp'], str)
+            dtypes.update(dict.fromkeys(self.CATEGORICAL, 'category'))
+            dtypes['smtp_code'] = 'Int32'
+            yield from pd.read_csv(self.spill_path, chunksize=chunk_size, dtype=dtypes)
+        if len(self._timestamps):
+            yield self._buffer_frame()
+
+    def to_frame(self, language: str = None) -> pd.DataFrame:
+        """Whole log as one DataFrame, optionally only the rows of one language"""
+        frames = [frame[frame['language'] == language] if language else frame
+                  for frame in self.iter_frames()]
+        if not frames:
+            return pd.DataFrame(columns=self.COLUMNS)
+        frame = pd.concat(frames, ignore_index=True)
+        for column in self.CATEGORICAL:
+            frame[column] = frame[column].astype('category')
+        return frame
+
+    def __iter__(self):
+        for frame in self.iter_frames():
+            yield from frame.to_dict('records')
+
+    @classmethod
+    def concat(cls, logs: Iterable['CampaignLog']) -> 'CampaignLog':
+        """One log with the rows of several logs, in order"""
+        combined = cls()
+        for log in logs:
+            for entry in log:
+                combined.append(entry)
+        return combined
+
+
+class CampaignProfiler:
+    """
+    cProfile and tracemalloc around one campaign run
+
+    Before Python 3.12 cProfile only sees the thread it was enabled in, so
+    sending workers wrap their loop in thread() and their profiles are merged
+    into the main one. From 3.12 on the main profiler covers every thread (and
+    a second active profiler is refused), so thread() does nothing.
+    stop() saves <name>.prof (for pstats/snakeviz) and <name>_allocations.txt
+    and returns the top functions and allocation sites.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, name: str = "campaign", top: int = 25):
+        self.directory = directory
+        safe_name = re.sub(r'[^\w.-]', '_', name)
+        self.name = f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.top = top
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._profile.enable()
+
+    @contextmanager
+    def thread(self):
+        """
+        Profile the body of a with-block running in a worker thread
+
+        A profiler that cannot be enabled is skipped with a warning: the block
+        always runs, only unprofiled
+        """
+        profile = cProfile.Profile() if sys.version_info < (3, 12) else None
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError as e:
+                print(f"⚠️ Worker thread not profiled: {e}")
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+
+    def stop(self) -> Dict:
+        """
+        Stop profiling and write the reports
+
+        Returns:
+            Dictionary with the report file paths, peak traced memory, the top
+            functions by cumulative time and the top allocation sites still
+            held at the end of the run
+        """
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ])
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            for profile in self._thread_profiles:
+                stats.add(profile)
+
+        top_functions = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]:
+            top_functions.append({
+                'function': function if filename == '~' else f"{function} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'total_seconds': round(total, 6),
+                'cumulative_seconds': round(cumulative, 6)
+            })
+
+        top_allocations = [{
+            'location': str(statistic.traceback[0]),
+            'size_bytes': statistic.size,
+            'blocks': statistic.count
+        } for statistic in snapshot.statistics('lineno')[:self.top]]
+
+        os.makedirs(self.directory, exist_ok=True)
+        profile_file = os.path.join(self.directory, f"{self.name}.prof")
+        allocations_file = os.path.join(self.directory, f"{self.name}_allocations.txt")
+        stats.dump_stats(profile_file)
+        with open(allocations_file, 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MB\n")
+            f.write(f"Top {len(top_allocations)} allocation sites held at the end of the run:\n\n")
+            for allocation in top_allocations:
+                f.write(f"{allocation['size_bytes'] / 1024:10.1f} KiB {allocation['blocks']:8} blocks  "
+                        f"{allocation['location']}\n")
+
+        print(f"🔬 Profile saved to {profile_file}")
+        return {
+            'profile_file': profile_file,
+            'allocations_file': allocations_file,
+            'peak_memory_bytes': peak,
+            'top_functions': top_functions,
+            'top_allocations': top_allocations
+        }
+
+
+def normalize_emails(emails: pd.Series) -> pd.Series:
+    """Normalize addresses for lookups: stripped and lowercased"""
+    return emails.astype(str).str.strip().str.lower()
+
+
+def _delivered_mask(emails: pd.Series, delivered: set) -> np.ndarray:
+    """Rows whose normalized address is in delivered: one set lookup per row, whatever the set's size"""
+    normalized = normalize_emails(emails)
+    return np.fromiter(map(delivered.__contains__, normalized), dtype=bool, count=len(normalized))
+
+
+class ContactValidator:
+    """
+    Vectorized address validation and deduplication over a stream of contact chunks
+
+    Addresses are stripped and their domain lowercased. Syntax is checked with
+    EMAIL_PATTERN, and email-validator handles internationalized addresses.
+    Duplicates are dropped by a 64-bit hash of the lowercased address, which
+    is remembered across chunks. Rejected rows are kept with a reason
+    (missing, invalid or duplicate) for report().
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._seen = set()
+        self._rejected = []
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Return the valid, first-seen contacts of chunk with normalized addresses"""
+        raw = chunk['email']
+        emails = raw.where(raw.notna(), '').astype(str).str.strip()
+        lowered = emails.str.lower()
+        # Only addresses with uppercase letters need splitting to lowercase just the domain
+        mixed_case = lowered != emails
+        if mixed_case.any():
+            local, at, domain = (emails[mixed_case].str.rpartition('@')[i] for i in range(3))
+            emails[mixed_case] = local + at + domain.str.lower()
+
+        missing = emails == ''
+        valid = (lowered.str.fullmatch(EMAIL_PATTERN)
+                 & (lowered.str.rfind('@') <= 64) & (lowered.str.len() <= 254))
+        # str.isascii() is pandas 3.0+ only (requirements allow pandas>=1.5)
+        international = ~valid & ~missing & lowered.str.contains(r'[^\x00-\x7f]', na=False)
+        if international.any():
+            emails[international], valid[international] = self._validate_international(emails[international])
+            lowered[international] = emails[international].str.lower()
+        invalid = ~valid & ~missing
+
+        keys = pd.util.hash_pandas_object(lowered, index=False).to_numpy()
+        seen = self._seen
+        duplicate = valid & (pd.Series(keys, index=chunk.index).duplicated()
+                             | np.fromiter((key in seen for key in keys), bool, len(keys)))
+        accepted = valid & ~duplicate
+        seen.update(keys[accepted.to_numpy()].tolist())
+
+        for reason, mask in (('missing', missing), ('invalid', invalid), ('duplicate', duplicate)):
+            if mask.any():
+                self.counts[reason] += int(mask.sum())
+                self._rejected.append(chunk[mask].assign(reason=reason))
+        return chunk[accepted].assign(email=emails[accepted])
+
+    @staticmethod
+    def _validate_international(emails: pd.Series) -> tuple:
+        """Check non-ASCII addresses with email-validator, returning (normalized, valid)"""
+        from email_validator import EmailNotValidError, validate_email
+
+        normalized = emails.copy()
+        valid = pd.Series(False, index=emails.index)
+        for index, email in emails.items():
+            try:
+                normalized[index] = validate_email(email, check_deliverability=False).normalized
+                valid[index] = True
+            except EmailNotValidError:
+                pass
+        return normalized, valid
+
+    def report(self) -> pd.DataFrame:
+        """Rejected contacts with a reason column"""
+        if not self._rejected:
+            return pd.DataFrame(columns=['name', 'email', 'reason'])
+        return pd.concat(self._rejected, ignore_index=True)
+
+
+def validate_contacts(contacts: pd.DataFrame) -> tuple:
+    """
+    Validate and deduplicate a contact list up front
+
+    Returns:
+        (valid contacts with normalized addresses, rejected contacts with a reason column)
+    """
+    validator = ContactValidator()
+    valid = pd.concat([validator.filter(chunk) for chunk in EmailCampaignBot.iter_contact_chunks(contacts)])
+    return valid, validator.report()
+
+
+class SendJournal:
+    """
+    Durable record of delivered recipients, keyed by campaign id and email
+
+    Each delivery is committed to SQLite as soon as the send completes, so a
+    campaign that crashes or is split over several sessions by send_limit
+    can resume without re-sending.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries ("
+            " campaign_id TEXT NOT NULL,"
+            " email TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " recorded_at TEXT NOT NULL,"
+            " PRIMARY KEY (campaign_id, email))"
+        )
+
+    def delivered(self, campaign_id: str) -> set:
+        """Normalized emails already delivered for a campaign, as a set for O(1) lookups"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email FROM deliveries WHERE campaign_id = ? AND status = 'success'", (campaign_id,)
+            )
+            return {email for (email,) in rows}
+
+    def record(self, campaign_id: str, email: str, status: str = 'success'):
+        """Record the outcome for a recipient (committed immediately)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO deliveries (campaign_id, email, status, recorded_at) VALUES (?, ?, ?, ?)",
+                (campaign_id, str(email).strip().lower(), status, datetime.now().isoformat())
+            )
+
+    def delivered_since(self, since: datetime) -> List[datetime]:
+        """When each successful delivery recorded after since (of every campaign) was made"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recorded_at FROM deliveries WHERE status = 'success' AND recorded_at >= ?",
+                (since.isoformat(),)
+            )
+            return [datetime.fromisoformat(recorded_at) for (recorded_at,) in rows]
+
+    def iter_delivered(self, campaign_id: str = None, batch_size: int = 100000):
+        """
+        Stream delivered emails in batches (of one campaign, or of every campaign)
+
+        Reads through a separate connection, so recording can continue meanwhile.
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            query = "SELECT DISTINCT email FROM deliveries WHERE status = 'success'"
+            cursor = conn.execute(query + " AND campaign_id = ?", (campaign_id,)) if campaign_id \
+                else conn.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [email for (email,) in rows]
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SuppressionList:
+    """
+    Addresses that must never be sent to: unsubscribes, bounces, earlier campaigns
+
+    Stored as a sorted array of 64-bit hashes of the normalized addresses
+    (8 bytes each), so millions of entries fit in memory and a chunk of
+    contacts is checked with one vectorized binary search. save() writes the
+    index to a .npy file; open() memory-maps it, so an index larger than RAM
+    stays on disk and only the pages a lookup touches are read.
+    """
+
+    def __init__(self, hashes: np.ndarray = None):
+        self._hashes = np.unique(hashes).astype(np.uint64) if hashes is not None else np.empty(0, np.uint64)
+        self._pending = []
+
+    @staticmethod
+    def hash_emails(emails: pd.Series) -> np.ndarray:
+        """64-bit hashes of normalized addresses (the same as ContactValidator's duplicate keys)"""
+        return pd.util.hash_pandas_object(normalize_emails(emails), index=False).to_numpy()
+
+    def add(self, emails: Iterable[str]):
+        """Suppress these addresses"""
+        emails = emails if isinstance(emails, pd.Series) else pd.Series(list(emails), dtype=object)
+        emails = emails.dropna()
+        if len(emails):
+            self._pending.append(self.hash_emails(emails))
+
+    def load_file(self, path: str, chunk_size: int = 100000) -> int:
+        """
+        Add the addresses of a CSV file (its email column, or else its first
+        column) or of a text file with one address per line
+
+        Returns:
+            Number of addresses read
+        """
+        before = sum(len(hashes) for hashes in self._pending)
+        if os.fspath(path).endswith('.csv'):
+            with pd.read_csv(path, chunksize=chunk_size, dtype=str) as reader:
+                for chunk in reader:
+                    self.add(chunk['email'] if 'email' in chunk.columns else chunk.iloc[:, 0])
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                batch = []
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        batch.append(line)
+                    if len(batch) >= chunk_size:
+                        self.add(batch)
+                        batch = []
+                self.add(batch)
+        added = sum(len(hashes) for hashes in self._pending) - before
+        print(f"🚫 {added} suppressed addresses loaded from {path}")
+        return added
+
+    def load_journal(self, journal: Union[str, 'SendJournal'], campaign_id: str = None) -> int:
+        """Add recipients delivered by earlier campaigns (or by one campaign) of a send journal"""
+        owns_journal = isinstance(journal, str)
+        if owns_journal:
+            journal = SendJournal(journal)
+        try:
+            added = 0
+            for emails in journal.iter_delivered(campaign_id):
+                self.add(emails)
+                added += len(emails)
+        finally:
+            if owns_journal:
+                journal.close()
+        print(f"🚫 {added} previously contacted addresses loaded from the send journal")
+        return added
+
+    def _index(self) -> np.ndarray:
+        """The sorted hash array, with addresses added since the last lookup merged in"""
+        if self._pending:
+            self._hashes = np.union1d(self._hashes, np.concatenate(self._pending)).astype(np.uint64)
+            self._pending = []
+        return self._hashes
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, email: str) -> bool:
+        return bool(self.contains(pd.Series([email], dtype=object)).iloc[0])
+
+    def contains(self, emails: pd.Series) -> pd.Series:
+        """Boolean mask (aligned with emails) of the suppressed addresses"""
+        index = self._index()
+        if not len(index) or not len(emails):
+            return pd.Series(False, index=emails.index)
+        hashes = self.hash_emails(emails)
+        positions = np.minimum(np.searchsorted(index, hashes), len(index) - 1)
+        return pd.Series(index[positions] == hashes, index=emails.index)
+
+    def save(self, path: str):
+        """Write the index to a .npy file for open()"""
+        np.save(path, self._index())
+
+    @classmethod
+    def open(cls, path: str) -> 'SuppressionList':
+        """Memory-map an index written by save()"""
+        suppression = cls()
+        suppression._hashes = np.load(path, mmap_mode='r')
+        return suppression
+
+
+class RateLimiter:
+    """
+    Schedule send starts to stay within a messages/minute and messages/day budget
+
+    Each acquire() reserves the next slot relative to the start of the
+    previous send, so time spent sending counts towards the interval.
+    Slots are handed out in order under a lock, which makes one limiter
+    usable by any number of sending threads.
+    """
+
+    def __init__(self, per_minute: float = None, per_day: int = None, jitter: float = 0.0,
+                 interval: float = None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            per_minute: Maximum send starts per minute
+            per_day: Maximum send starts per rolling 24 hours
+            jitter: Extra random delay (0 to jitter seconds) added to each interval
+            interval: Minimum seconds between send starts (overrides per_minute)
+        """
+        if interval is None:
+            interval = 60.0 / per_minute if per_minute else 0.0
+        self.interval = interval
+        self.jitter = jitter
+        self.per_day = per_day
+        self._next_slot = None
+        self._day_window = deque()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    @classmethod
+    def from_delays(cls, delay_min: float, delay_max: float, per_day: int = None) -> 'RateLimiter':
+        """Limiter equivalent to a random delay_min..delay_max pause between sends"""
+        return cls(interval=delay_min, jitter=max(delay_max - delay_min, 0), per_day=per_day)
+
+    def preload(self, sent_at: Iterable[datetime]):
+        """
+        Count sends made before this limiter existed against the daily budget
+
+        Args:
+            sent_at: When the earlier sends were made, e.g. from
+                SendJournal.delivered_since(); only the last 24 hours count
+        """
+        now, wall_now = time.monotonic(), datetime.now()
+        with self._lock:
+            earlier = (now - (wall_now - at).total_seconds() for at in sent_at)
+            self._day_window = deque(sorted(chain(self._day_window, earlier)))
+
+    def remaining(self) -> Optional[int]:
+        """Send starts left in the daily budget right now (None without a per_day budget)"""
+        if not self.per_day:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            while self._day_window and now - self._day_window[0] >= 86400:
+                self._day_window.popleft()
+            return max(self.per_day - len(self._day_window), 0)
+
+    def _reserve(self, weight: int) -> Optional[tuple]:
+        """Take the next slot: (slot, delay, next slot before and after), None if over the daily budget"""
+        with self._lock:
+            now = time.monotonic()
+            if self.per_day:
+                while self._day_window and now - self._day_window[0] >= 86400:
+                    self._day_window.popleft()
+                if len(self._day_window) + weight > self.per_day:
+                    return None
+            previous = self._next_slot
+            slot = now if previous is None else max(now, previous)
+            self._next_slot = slot + self.interval + (random.uniform(0, self.jitter) if self.jitter else 0)
+            if self.per_day:
+                self._day_window.extend(repeat(slot, weight))
+            delay = max(slot - now, 0.0)
+            self.waited += delay
+            return slot, delay, previous, self._next_slot
+
+    def _give_back(self, reservation: tuple, weight: int):
+        """Undo a reservation whose wait was interrupted (the send never started)"""
+        slot, _, previous, next_slot = reservation
+        with self._lock:
+            if self.per_day:
+                for _ in range(weight):
+                    self._day_window.remove(slot)
+            # Later reservations are already queued behind this one: keep their spacing then
+            if self._next_slot == next_slot:
+                self._next_slot = previous
+            self.waited -= max(slot - time.monotonic(), 0.0)
+
+    def reserve(self, weight: int = 1) -> Optional[float]:
+        """
+        Take the next send slot without waiting for it
+
+        Returns:
+            Seconds until the slot starts (0 if it is free now), or None if the
+            daily budget is exhausted; the caller waits, e.g. with asyncio.sleep
+        """
+        reservation = self._reserve(weight)
+        return None if reservation is None else reservation[1]
+
+    def acquire(self, cancel_event: threading.Event = None, weight: int = 1) -> bool:
+        """
+        Wait for the next send slot
+
+        Args:
+            cancel_event: Event that interrupts the wait; the slot is given back
+                then, so it does not count against the daily budget
+            weight: Messages counted against the daily budget (recipients of a
+                broadcast batch); the interval applies once per slot
+
+        Returns:
+            False if the daily budget is exhausted or cancel_event was set while waiting
+        """
+        reservation = self._reserve(weight)
+        if reservation is None:
+            return False
+        delay = reservation[1]
+        if delay <= 0:
+            return True
+        print(f"⏳ Waiting {delay:.0f} seconds...")
+        if cancel_event is not None:
+            if cancel_event.wait(delay):
+                self._give_back(reservation, weight)
+                return False
+            return True
+        time.sleep(delay)
+        return True
+
+
+def classify_smtp_error(error: Exception) -> tuple:
+    """
+    Classify a failed send as transient (worth retrying later) or permanent
+
+    Returns:
+        (transient, smtp_code): 4xx replies, dropped connections and network
+        errors (any OSError) are transient; 5xx replies, refused recipients
+        (unless every refusal is 4xx), certificate verification failures,
+        other SMTP protocol errors and anything else are permanent. smtp_code
+        is None when the server gave no reply
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        transient = bool(codes) and all(400 <= code < 500 for code in codes)
+        return transient, codes[0] if codes else None
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500, error.smtp_code
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True, None
+    # SMTPException is an OSError too, but its remaining cases are protocol errors
+    if isinstance(error, (ssl.SSLCertVerificationError, smtplib.SMTPException)):
+        return False, None
+    return isinstance(error, OSError), None
+
+
+def _smtp_error_text(error: Exception) -> str:
+    """The server's reply text of a failed send (the exception message if there was none)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        reply = next(iter(error.recipients.values()))[1]
+    else:
+        reply = getattr(error, 'smtp_error', None)
+    if reply is None:
+        return str(error)
+    return reply.decode(errors='replace') if isinstance(reply, bytes) else str(reply)
+
+
+class RetryPolicy:
+    """Exponential backoff for transient send failures"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 60.0, max_delay: float = 3600.0,
+                 jitter: float = 0.1):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts: Attempts per recipient, including the first one
+            base_delay: Seconds before the first retry; doubled for every further attempt
+            max_delay: Upper bound for the backoff
+            jitter: Random extra delay as a fraction of the backoff
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempts: int) -> float:
+        """Backoff before the next attempt, after attempts failed ones"""
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        return delay * (1 + random.uniform(0, self.jitter)) if self.jitter else delay
+
+
+class RetryQueue:
+    """Deferred send jobs, ordered by when they are due for another attempt (thread-safe)"""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.retried = 0
+        self._heap = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, job: Dict, delay: float = None):
+        """Defer a job by delay seconds (by the policy's backoff for its attempts if None)"""
+        if delay is None:
+            delay = self.policy.delay(job.get('attempts', 1))
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._sequence, job))
+            self._sequence += 1
+
+    def pop_due(self) -> Optional[Dict]:
+        """The next job whose backoff has elapsed, or None"""
+        with self._lock:
+            if not self._heap or self._heap[0][0] > time.monotonic():
+                return None
+            self.retried += 1
+            return heapq.heappop(self._heap)[2]
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until the next job is due (None when the queue is empty)"""
+        with self._lock:
+            return max(self._heap[0][0] - time.monotonic(), 0.0) if self._heap else None
+
+    def drain(self) -> List[Dict]:
+        """Remove and return every deferred job"""
+        with self._lock:
+            jobs = [job for _, _, job in sorted(self._heap)]
+            self._heap = []
+            return jobs
+
+
+class CampaignControl:
+    """
+    Pause/resume/cancel switch for a running campaign
+
+    Safe to use from another thread. Pausing or cancelling also interrupts a
+    pacing wait in progress, so the campaign reacts immediately instead of
+    after the current delay.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self.interrupt = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def pause(self):
+        """Stop starting new sends until resume()"""
+        self._running.clear()
+        self.interrupt.set()
+
+    def resume(self):
+        """Continue a paused campaign"""
+        if not self.cancelled:
+            self.interrupt.clear()
+        self._running.set()
+
+    def cancel(self):
+        """Stop the campaign; sends already in progress are completed"""
+        self._cancelled.set()
+        self.interrupt.set()
+        self._running.set()
+
+    def checkpoint(self) -> bool:
+        """Block while paused; returns False once the campaign is cancelled"""
+        self._running.wait()
+        return not self.cancelled
+
+
+class SenderAccount:
+    """One sender identity (or relay) of a sharded campaign, with its own sending budget"""
+
+    def __init__(self, email: str, password: str, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587,
+                 use_tls: bool = True, per_minute: float = None, per_day: int = None, weight: int = 1,
+                 send_limit: int = None, transport: Transport = None):
+        """
+        Initialize the account
+
+        Args:
+            email/password/smtp_server/smtp_port/use_tls: As for EmailCampaignBot
+            per_minute: Maximum send starts per minute for this account
+            per_day: Daily sending quota of this account
+            weight: Share of the contacts (weighted and domain sharding) and of
+                the campaign's send_limit
+            send_limit: Sends for this account (overrides its share of send_limit)
+            transport: Delivery backend (defaults to SMTP)
+        """
+        self.email = email
+        self.password = password
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.use_tls = use_tls
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.weight = weight
+        self.send_limit = send_limit
+        self.transport = transport
+
+    def rate_limiter(self, delay_min: float, delay_max: float) -> RateLimiter:
+        """This account's pacing: its own per-minute rate, or the campaign's delays, and its daily quota"""
+        if self.per_minute:
+            return RateLimiter(per_minute=self.per_minute, per_day=self.per_day)
+        return RateLimiter.from_delays(delay_min, delay_max, per_day=self.per_day)
+
+
+def shard_contacts(chunk: pd.DataFrame, start: int, weights: List[int], strategy: str = "round_robin") -> np.ndarray:
+    """
+    Account index of every contact of a chunk
+
+    Args:
+        chunk: Contacts (with an email column)
+        start: Position of the chunk's first contact in the whole list
+        weights: Integer weight per account
+        strategy: round_robin (one contact per account in turn), weighted
+            (round robin in proportion to the weights) or domain (every
+            recipient domain sticks to one account, domains spread by weight)
+    """
+    if strategy == 'round_robin':
+        return np.arange(start, start + len(chunk)) % len(weights)
+    slots = np.repeat(np.arange(len(weights)), weights)
+    if strategy == 'weighted':
+        return slots[np.arange(start, start + len(chunk)) % len(slots)]
+    domains = normalize_emails(chunk['email']).str.rpartition('@')[2]
+    return slots[pd.util.hash_pandas_object(domains, index=False).to_numpy() % len(slots)]
+
+
+class _CampaignRun:
+    """
+    State and bookkeeping shared by run_campaign and run_campaign_async
+
+    Holds the counters, campaign log and language statistics of one run,
+    opens the send journal and pins the shared attachments; close() releases
+    what the run held and summary() builds the returned statistics.
+    """
+
+    def __init__(self, bot: 'EmailCampaignBot', metrics: 'StageMetrics', campaign_id: str,
+                 journal: Union[str, SendJournal], validate: bool, suppression: Optional[SuppressionList],
+                 attachments_config: Optional[Dict], on_progress: Optional[Callable[[Dict], None]]):
+        self.bot = bot
+        self.metrics = metrics
+        self.campaign_id = campaign_id
+        self.suppression = suppression
+        self.attachments_config = attachments_config
+        self.on_progress = on_progress
+        self.counts = {'read': 0, 'skipped': 0, 'suppressed': 0, 'successful': 0, 'failed': 0}
+        self.campaign_log = CampaignLog()
+        self.language_stats = {}
+        self.load_errors = []
+        self.validator = ContactValidator() if validate else None
+        self.metrics_server = None
+        self.attachment_cache_stats = None
+
+        # Recipients delivered by earlier runs of this campaign are skipped before rendering
+        self.owns_journal = isinstance(journal, str)
+        self.journal = SendJournal(journal) if self.owns_journal else journal
+        self.delivered = {}  # journal id -> normalized emails delivered
+
+        # Common and per-language attachments are encoded once for the whole campaign
+        if attachments_config:
+            bot.attachment_cache.pin(attachments_config.get('common', []))
+            for lang_attachments in attachments_config.get('by_language', {}).values():
+                bot.attachment_cache.pin(lang_attachments)
+
+    def load_delivered(self, journal_id: str) -> set:
+        """Recipients the journal already has for journal_id (kept up to date by mark_delivered)"""
+        emails = self.delivered[journal_id] = self.journal.delivered(journal_id) if self.journal else set()
+        if emails:
+            print(f"📒 {len(emails)} recipients already delivered for campaign '{journal_id}'")
+        return emails
+
+    def mark_delivered(self, journal_id: str, email: str) -> str:
+        """Skip email for the rest of the run, returning it normalized for the journal"""
+        normalized = str(email).strip().lower()
+        self.delivered[journal_id].add(normalized)
+        return normalized
+
+    def read_contacts(self, first_chunk: pd.DataFrame, contact_chunks, done: Callable[[], bool]):
+        """Validated, unsuppressed contact chunks; reading stops once done() is true"""
+        metrics = self.metrics
+        try:
+            chunk = first_chunk
+            while chunk is not None:
+                self.counts['read'] += len(chunk)
+                if self.validator:
+                    with metrics.time('validation'):
+                        chunk = self.validator.filter(chunk)
+                if self.suppression is not None:
+                    with metrics.time('suppression'):
+                        suppressed = self.suppression.contains(chunk['email'])
+                    self.counts['suppressed'] += int(suppressed.sum())
+                    chunk = chunk[~suppressed]
+                yield chunk
+                if done():
+                    return
+                with metrics.time('contact_load'):
+                    chunk = next(contact_chunks, None)
+        except Exception as e:
+            # Keep what was already sent; report the rest of the file as unreadable
+            print(f"❌ Error loading contacts: {e}")
+            self.load_errors.append(str(e))
+        finally:
+            contact_chunks.close()
+
+    def prepare(self, index, contact, language, subject, message, outgoing=None) -> Dict:
+        """Send job for a rendered row, counted in the language statistics"""
+        job = self.bot._prepare_job(index, contact, language, subject, message, self.attachments_config)
+        if outgoing is not None:
+            # Built ahead by a builder process
+            job['outgoing'] = outgoing
+        language = job['language']
+        if language not in self.language_stats:
+            self.language_stats[language] = {'attempted': 0, 'successful': 0, 'failed': 0}
+        self.language_stats[language]['attempted'] += 1
+        return job
+
+    def notify(self, job: Dict):
+        if self.on_progress:
+            self.on_progress({
+                'event': 'delivery',
+                'email': job['contact'].get('email'),
+                'name': job['contact'].get('name'),
+                'language': job['language'],
+                'status': job['log_entry']['status']
+            })
+
+    def record(self, job: Dict, sent: bool):
+        outcome = 'successful' if sent else 'failed'
+        self.counts[outcome] += 1
+        self.language_stats[job['language']][outcome] += 1
+        self.metrics.count_send(job['log_entry']['status'])
+        self.campaign_log.append(job['log_entry'])
+
+    def serve_metrics(self, metrics_port: Optional[int]):
+        """Collect stage timings on the bot and its SMTP pool, served on metrics_port if given"""
+        self.bot.metrics = self.metrics
+        self.bot.smtp_pool.metrics = self.metrics
+        if metrics_port is not None:
+            try:
+                self.metrics_server = self.metrics.serve(metrics_port)
+            except OSError as e:
+                print(f"⚠️ Could not serve metrics on port {metrics_port}: {e}")
+
+    def close(self):
+        """Close sessions reused across the campaign, the journal and the metrics server"""
+        bot = self.bot
+        bot.transport.close()
+        if self.owns_journal:
+            self.journal.close()
+        self.attachment_cache_stats = bot.attachment_cache.stats
+        bot.attachment_cache.clear()
+        bot.metrics = None
+        bot.smtp_pool.metrics = None
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+
+    def summary(self, metrics_file: Optional[str], **fields) -> Dict:
+        """Campaign statistics (fields are the runner's own), also printed and written to metrics_file"""
+        validator = self.validator
+        stats = {
+            'total_contacts': self.counts['read'],
+            'skipped_already_sent': self.counts['skipped'],
+            'suppressed': self.counts['suppressed'],
+            'campaign_id': self.campaign_id,
+            'successful_sends': self.counts['successful'],
+            'failed_sends': self.counts['failed'],
+            'completion_time': datetime.now().isoformat(),
+            'campaign_log': self.campaign_log,
+            'language_statistics': self.language_stats,
+            'attachment_cache': self.attachment_cache_stats,
+            **fields,
+            'stage_timings': self.metrics.summary(),
+            'invalid_emails': validator.counts['missing'] + validator.counts['invalid'] if validator else 0,
+            'duplicate_emails': validator.counts['duplicate'] if validator else 0,
+            'rejected_contacts': validator.report() if validator else None
+        }
+        if self.load_errors:
+            stats['load_error'] = self.load_errors[0]
+        if metrics_file:
+            try:
+                self.metrics.write_openmetrics(metrics_file)
+                stats['metrics_file'] = metrics_file
+            except OSError as e:
+                print(f"⚠️ Could not write metrics to {metrics_file}: {e}")
+
+        self.bot._print_summary(stats)
+        return stats
 
 
 class EmailCampaignBot:
-    def __init__(self, email: str, password: str, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587):
+    def __init__(self, email: str, password: str, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587,
+                 use_tls: bool = True, transport: Transport = None, accounts: List[SenderAccount] = None):
         """
         Initialize the Email Campaign Bot
         
@@ -24,6 +2365,11 @@ class EmailCampaignBot:
             password: Email password (app password for Gmail)
             smtp_server: SMTP server address
             smtp_port: SMTP server port
+            use_tls: Use STARTTLS (disable only for local relays without TLS)
+            transport: Delivery backend (defaults to SMTP over the connection pool);
+                e.g. SpoolTransport to render a campaign to .eml files
+            accounts: Sender accounts that run_sharded_campaign spreads a
+                campaign over
         """
         self.email = email
         self.password = password
@@ -31,6 +2377,18 @@ class EmailCampaignBot:
         self.smtp_port = smtp_port
         self.templates = {}
         self.subject_templates = {}
+        self._compiled_templates = {}
+        self.smtp_pool = SMTPConnectionPool(smtp_server, smtp_port, email, password, use_tls=use_tls)
+        self.transport = transport or SMTPTransport(self.smtp_pool)
+        self.null_transport = NullTransport()
+        self.attachment_cache = AttachmentCache()
+        self.metrics = None  # StageMetrics of the running campaign
+        self.accounts = list(accounts or [])
+
+    def close(self):
+        """Close pooled SMTP sessions (and whatever else the transport holds)"""
+        self.transport.close()
+        self.smtp_pool.close()
 
     def load_templates_from_file(self, templates_file: str):
         """Load email templates from JSON file"""
@@ -160,6 +2518,28 @@ class EmailCampaignBot:
             }
         }
 
+    def compile_template(self, template: str) -> CompiledTemplate:
+        """Compile a template once and reuse it for as long as its text is unchanged"""
+        compiled = self._compiled_templates.get(template)
+        if compiled is None:
+            if len(self._compiled_templates) >= 256:
+                # Templates edited many times in the UI; drop stale versions
+                self._compiled_templates.clear()
+            compiled = self._compiled_templates[template] = CompiledTemplate(template)
+        return compiled
+
+    def _subject_choices(self, language: str) -> tuple:
+        """Subject templates for a language, returning (language used, subjects)"""
+        if language not in self.subject_templates:
+            language = "en"  # fallback
+            
+        return language, self.subject_templates.get(language, ["Contact from {sender_name}"])
+
+    def _pick_subject(self, language: str) -> tuple:
+        """Pick a random compiled subject template, returning (language used, template)"""
+        language, subjects = self._subject_choices(language)
+        return language, self.compile_template(random.choice(subjects))
+
     def personalize_message(self, template: str, contact_data: Dict, global_vars: Dict = None) -> str:
         """
         Personalize message with contact data and global variables
@@ -169,175 +2549,945 @@ class EmailCampaignBot:
             contact_data: Individual contact information
             global_vars: Global variables (sender info, etc.)
         """
-        message = template
-        
-        # Merge contact data with global variables
-        all_vars = {}
-        if global_vars:
-            all_vars.update(global_vars)
-        all_vars.update(contact_data)
-        
-        # Handle language-specific sender information
-        email_language = contact_data.get('language', 'en')
-        
-        # Check if we have language-specific sender info
-        if global_vars:
-            # Look for language-specific variables first
-            for key in ['sender_name', 'sender_title', 'sender_contact', 'meeting_duration', 'call_to_action']:
-                lang_specific_key = f"{key}_{email_language}"
-                if lang_specific_key in global_vars:
-                    all_vars[key] = global_vars[lang_specific_key]
-                elif key not in all_vars and key in global_vars:
-                    # Fallback to general version if no language-specific version exists
-                    all_vars[key] = global_vars[key]
-        
-        # Replace placeholders
-        for key, value in all_vars.items():
-            if pd.notna(value) and value is not None:
-                placeholder = f"{{{key}}}"
-                message = message.replace(placeholder, str(value))
-        
-        # Handle source info specially
-        source_info = ""
-        if 'source' in contact_data and pd.notna(contact_data['source']):
-            source_info = f" on {contact_data['source']}"
-        message = message.replace("{source_info}", source_info)
-        
-        # Clean up any remaining unfilled placeholders
-        message = re.sub(r'\{[^}]*\}', '', message)
-        
-        return message
+        renderer = TemplateRenderer(global_vars)
+        return renderer.render_message(self.compile_template(template), contact_data)
 
     def generate_subject(self, contact_data: Dict, language: str = "en", global_vars: Dict = None) -> str:
         """Generate personalized subject line"""
-        if language not in self.subject_templates:
-            language = "en"  # fallback
-            
-        subjects = self.subject_templates.get(language, ["Contact from {sender_name}"])
-        subject_template = random.choice(subjects)
-        
-        # Merge variables for subject personalization
-        all_vars = {}
-        if global_vars:
-            all_vars.update(global_vars)
-        all_vars.update(contact_data)
-        
-        # Handle language-specific sender information for subject
-        # Look for language-specific variables first
-        if global_vars:
-            for key in ['sender_name', 'sender_title', 'sender_contact', 'meeting_duration', 'call_to_action']:
-                lang_specific_key = f"{key}_{language}"
-                if lang_specific_key in global_vars:
-                    all_vars[key] = global_vars[lang_specific_key]
-                elif key not in all_vars and key in global_vars:
-                    # Fallback to general version if no language-specific version exists
-                    all_vars[key] = global_vars[key]
-        
-        # Replace placeholders in subject
-        for key, value in all_vars.items():
-            if pd.notna(value) and value is not None:
-                placeholder = f"{{{key}}}"
-                subject_template = subject_template.replace(placeholder, str(value))
-        
-        return subject_template
+        language, subject_template = self._pick_subject(language)
+        return TemplateRenderer(global_vars).render_subject(subject_template, contact_data, language)
+
+    def resolve_languages(self, df: pd.DataFrame, default_language: str = "en") -> pd.Series:
+        """
+        Resolve the template language of every contact
+
+        Priority: contact language > default language > first available template
+        """
+        available_languages = list(self.templates.keys())
+        if 'language' in df.columns:
+            requested = df['language']
+        else:
+            requested = pd.Series(default_language, index=df.index, dtype=object)
+
+        available = requested.isin(available_languages)
+        if available.all():
+            return requested.astype(object)
+
+        fallback = default_language if default_language in self.templates else available_languages[0]
+        print(f"⚠️ {int((~available).sum())} contact(s) without an available template language, using {fallback}")
+        return requested.astype(object).where(available, fallback)
+
+    def render_batch(self, df: pd.DataFrame, global_vars: Dict = None, default_language: str = "en") -> tuple:
+        """
+        Render subjects and bodies for a whole contact list at once
+
+        Args:
+            df: Contacts DataFrame
+            global_vars: Global variables (sender info, etc.)
+            default_language: Default language if not specified in contact data
+
+        Returns:
+            (subjects, bodies) as Series aligned with df.index
+        """
+        languages = self.resolve_languages(df, default_language)
+        return self._render_batch(df, languages, TemplateRenderer(global_vars))
+
+    def _render_batch(self, df: pd.DataFrame, languages: pd.Series, renderer: TemplateRenderer) -> tuple:
+        """Render each language group of df with column-wise operations"""
+        subjects = np.empty(len(df), dtype=object)
+        bodies = np.empty(len(df), dtype=object)
+        language_values = languages.to_numpy()
+
+        for language in pd.unique(language_values):
+            positions = np.flatnonzero(language_values == language)
+            group = df.iloc[positions]
+
+            template = self.compile_template(self.templates[language])
+            bodies[positions] = renderer.render_frame(template, group, language)
+
+            # Random subject per contact, rendered per chosen subject template
+            subject_language, choices = self._subject_choices(language)
+            picks = np.array(random.choices(range(len(choices)), k=len(positions)))
+            for choice in np.unique(picks):
+                chosen = np.flatnonzero(picks == choice)
+                subject_template = self.compile_template(choices[choice])
+                subjects[positions[chosen]] = renderer.render_frame(
+                    subject_template, group.iloc[chosen], subject_language, keep_missing=True
+                )
+
+        return pd.Series(subjects, index=df.index), pd.Series(bodies, index=df.index)
+
+    def _iter_rendered(self, contact_chunks, renderer: TemplateRenderer, default_language: str,
+                       metrics: StageMetrics = None):
+        """Render contacts chunk by chunk, yielding (index, contact, language, subject, body)"""
+        for df in contact_chunks:
+            for start in range(0, len(df), RENDER_CHUNK_SIZE):
+                chunk = df.iloc[start:start + RENDER_CHUNK_SIZE]
+                with _timed(metrics, 'language_resolution'):
+                    languages = self.resolve_languages(chunk, default_language)
+                with _timed(metrics, 'render'):
+                    subjects, bodies = self._render_batch(chunk, languages, renderer)
+                yield from zip(chunk.index, chunk.to_dict('records'), languages, subjects, bodies)
+
+    @staticmethod
+    def iter_contact_chunks(contacts, chunk_size: int = CONTACT_CHUNK_SIZE):
+        """
+        Read contacts as a stream of DataFrame chunks
+
+        Args:
+            contacts: Path to a CSV/Excel file, a DataFrame, an iterable of
+                contact mappings (e.g. dicts with 'name' and 'email'), or an
+                iterable of DataFrame chunks (passed through as they are)
+            chunk_size: Contacts per chunk
+
+        Only one chunk is held in memory at a time (besides an in-memory
+        DataFrame itself), and reading stops as soon as the consumer stops iterating.
+        """
+        if isinstance(contacts, pd.DataFrame):
+            for start in range(0, max(len(contacts), 1), chunk_size):
+                yield contacts.iloc[start:start + chunk_size]
+            return
+
+        if not isinstance(contacts, (str, os.PathLike)):
+            contacts = iter(contacts)
+            first = next(contacts, None)
+            if isinstance(first, pd.DataFrame):
+                yield first
+                yield from contacts
+                return
+            start = 0
+            batch = []
+            for contact in chain([first] if first is not None else [], contacts):
+                batch.append(contact)
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame.from_records(batch, index=range(start, start + len(batch)))
+                    start += len(batch)
+                    batch = []
+            if batch or not start:
+                yield pd.DataFrame.from_records(batch, index=range(start, start + len(batch)))
+            return
+
+        contacts_file = os.fspath(contacts)
+        if not contacts_file.endswith('.xlsx'):
+            with pd.read_csv(contacts_file, chunksize=chunk_size) as reader:
+                yield from reader
+            return
 
-    def send_email(self, recipient: str, subject: str, body: str, attachments: List[str] = None) -> bool:
-        """Send individual email with attachments"""
+        workbook = load_workbook(contacts_file, read_only=True, data_only=True)
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-
-            # Add body
-            msg.attach(MIMEText(body, 'html'))
-
-            # Add attachments
-            if attachments:
-                for file_path in attachments:
-                    if os.path.exists(file_path):
-                        self._add_attachment(msg, file_path)
-                    else:
-                        print(f"⚠️ Attachment not found: {file_path}")
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [column if column is not None else f"Unnamed: {i}" for i, column in enumerate(header)]
+            start = 0
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=columns, index=range(start, start + len(batch)))
+                    start += len(batch)
+                    batch = []
+            if batch or not start:
+                yield pd.DataFrame(batch, columns=columns, index=range(start, start + len(batch)))
+        finally:
+            workbook.close()
 
-            # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email, self.password)
-            server.send_message(msg)
-            server.quit()
+    def build_message(self, recipient: str, subject: str, body: str, attachments: List[str] = None) -> OutgoingMessage:
+        """Build an outgoing message; attachments are referenced, not copied"""
+        segments, missing = message_segments(self.email, recipient, subject, body, attachments,
+                                             self.attachment_cache.get)
+        for file_path in missing:
+            print(f"⚠️ Attachment not found: {file_path}")
+        return OutgoingMessage(self.email, [recipient], segments)
+
+    def send_email(self, recipient: str, subject: str, body: str, attachments: List[str] = None,
+                   transport: Transport = None) -> bool:
+        """Send individual email with attachments (through self.transport unless one is given)"""
+        transport = transport or self.transport
+        try:
+            with _timed(self.metrics, 'mime_build'):
+                message = self.build_message(recipient, subject, body, attachments)
+            transport.send(message)
 
-            print(f"✅ Email sent successfully to {recipient}")
+            print(f"✅ Email {transport.action} successfully to {recipient}")
             return True
 
         except Exception as e:
             print(f"❌ Error sending email to {recipient}: {e}")
             return False
 
-    def _add_attachment(self, msg: MIMEMultipart, file_path: str):
-        """Add attachment to email message"""
-        content_type, encoding = mimetypes.guess_type(file_path)
-        if content_type is None or encoding is not None:
-            content_type = 'application/octet-stream'
+    def broadcast_blockers(self, renderer: TemplateRenderer, languages: List[str], columns) -> List[str]:
+        """
+        Reasons why messages would differ between contacts with these columns
+
+        Returns:
+            One entry per language (or per-contact attachment column) that
+            depends on the contact; empty when broadcast mode can be used
+        """
+        blockers = []
+        if 'attachment' in columns:
+            blockers.append("per-contact 'attachment' column")
+        for language in languages:
+            if language not in self.templates:
+                continue
+            template = self.compile_template(self.templates[language])
+            varying = renderer.varying_placeholders(template, language, columns)
+            subject_language, subjects = self._subject_choices(language)
+            for subject in subjects:
+                varying |= renderer.varying_placeholders(self.compile_template(subject), subject_language,
+                                                         columns, body=False)
+            if varying:
+                blockers.append(f"{language}: {', '.join('{' + name + '}' for name in sorted(varying))}")
+        return blockers
+
+    @staticmethod
+    def _job_attachments(contact_dict: Dict, language: str, attachments_config: Dict) -> List[str]:
+        """Attachment paths of one contact's message"""
+        attachments = []
 
-        main_type, sub_type = content_type.split('/', 1)
-        filename = os.path.basename(file_path)
+        # Add language-specific attachments
+        if attachments_config and 'by_language' in attachments_config:
+            lang_attachments = attachments_config['by_language'].get(language, [])
+            attachments.extend(lang_attachments)
 
-        if main_type == 'text':
-            with open(file_path, 'r', encoding='utf-8') as fp:
-                attachment = MIMEText(fp.read(), _subtype=sub_type)
-        else:
-            with open(file_path, 'rb') as fp:
-                attachment = MIMEBase(main_type, sub_type)
-                attachment.set_payload(fp.read())
-                encoders.encode_base64(attachment)
+        # Add common attachments
+        if attachments_config and 'common' in attachments_config:
+            attachments.extend(attachments_config['common'])
+
+        # Add contact-specific attachments
+        if 'attachment' in contact_dict and pd.notna(contact_dict['attachment']):
+            attachments.append(contact_dict['attachment'])
+
+        return attachments
+
+    def _iter_built(self, rows, attachments_config: Dict, build_workers: int, metrics: StageMetrics = None):
+        """
+        Build the messages of rendered rows in a process pool
+
+        Rows go to the builder processes in chunks of BUILD_CHUNK_SIZE and come
+        back in order, each with its OutgoingMessage appended; up to two chunks
+        per process are in flight, so building runs a bounded distance ahead of
+        sending. Shared (pinned) and streamed attachments are not copied between
+        processes: builders leave their paths and this process's cache fills them in.
+        """
+        cache = self.attachment_cache
+        executor = ProcessPoolExecutor(build_workers, initializer=_init_builder,
+                                       initargs=(sorted(cache.pinned_paths), cache.max_bytes, cache.stream_threshold))
+        pending = deque()
+
+        def submit(batch):
+            work = [(contact['email'], subject, body, self._job_attachments(contact, language, attachments_config))
+                    for _, contact, language, subject, body in batch]
+            pending.append((batch, executor.submit(_build_messages, self.email, work)))
+
+        def collect():
+            batch, future = pending.popleft()
+            for row, (segments, missing, seconds) in zip(batch, future.result()):
+                for file_path in missing:
+                    print(f"⚠️ Attachment not found: {file_path}")
+                if metrics is not None:
+                    metrics.observe('mime_build', seconds)
+                segments = [cache.get(segment) or b'' if isinstance(segment, str) else segment
+                            for segment in segments]
+                yield (*row, OutgoingMessage(self.email, [row[1]['email']], segments))
+
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) < BUILD_CHUNK_SIZE:
+                    continue
+                submit(batch)
+                batch = []
+                if len(pending) >= 2 * build_workers:
+                    yield from collect()
+            if batch:
+                submit(batch)
+            while pending:
+                yield from collect()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            rows.close()
+
+    def _prepare_job(self, index, contact_dict: Dict, language: str, subject: str, message: str,
+                     attachments_config: Dict) -> Dict:
+        """Collect attachments and the log entry for one rendered contact"""
+        attachments = self._job_attachments(contact_dict, language, attachments_config)
+
+        # Log campaign entry
+        log_entry = {
+            'timestamp': datetime.now(),
+            'name': contact_dict.get('name', 'Unknown'),
+            'email': contact_dict.get('email', 'Unknown'),
+            'language': language,
+            'original_language': contact_dict.get('language', 'Not specified'),
+            'subject': subject,
+            'attachments_count': len(attachments),
+            'template_used': language in self.templates
+        }
+
+        return {
+            'index': index,
+            'contact': contact_dict,
+            'language': language,
+            'subject': subject,
+            'message': message,
+            'attachments': attachments,
+            'log_entry': log_entry
+        }
+
+    def _deliver(self, job: Dict, test_mode: bool, on_delivered=None) -> Optional[bool]:
+        """
+        Send (or simulate in test mode) a prepared job and set its log status
+
+        on_delivered(email) is called right after a real (non-test) delivery.
+        The message is built once and kept in job['outgoing'] while the job is
+        deferred, so a retry resends the same bytes.
+
+        Returns:
+            True when delivered, False on a permanent failure and None on a
+            transient one (status 'deferred'; the job can be delivered again)
+        """
+        transport = self.null_transport if test_mode else self.transport
+        try:
+            transport.send(self._start_attempt(job))
+        except Exception as e:
+            return self._attempt_failed(job, e)
+        return self._attempt_succeeded(job, test_mode, transport.action, on_delivered)
+
+    def _start_attempt(self, job: Dict) -> OutgoingMessage:
+        """Count a send attempt and build the job's message (once, it is kept for retries)"""
+        contact_dict = job['contact']
+        job['log_entry']['attempts'] = job['attempts'] = job.get('attempts', 0) + 1
+        action = "Sending" if job['attempts'] == 1 else f"Retrying (attempt {job['attempts']})"
+        print(f"\n📤 {action} to {contact_dict.get('name', 'Unknown')} ({contact_dict.get('email', 'Unknown')}) - Language: {job['language'].upper()}")
+
+        # The complete message is built even in test mode (MIME, attachments) and then discarded
+        if 'outgoing' not in job:
+            with _timed(self.metrics, 'mime_build'):
+                job['outgoing'] = self.build_message(contact_dict['email'], job['subject'], job['message'],
+                                                     job['attachments'])
+        return job['outgoing']
+
+    @staticmethod
+    def _attempt_failed(job: Dict, error: Exception) -> Optional[bool]:
+        """Log a failed attempt: None if it is worth retrying (status 'deferred'), False otherwise"""
+        log_entry = job['log_entry']
+        email = job['contact']['email']
+        transient, log_entry['smtp_code'] = classify_smtp_error(error)
+        log_entry['error'] = _smtp_error_text(error)
+        if transient:
+            print(f"⏳ Temporary failure for {email}: {error}")
+            log_entry['status'] = 'deferred'
+            return None
+        print(f"❌ Error sending email to {email}: {error}")
+        log_entry['status'] = 'failed'
+        job.pop('outgoing', None)
+        return False
+
+    @staticmethod
+    def _attempt_succeeded(job: Dict, test_mode: bool, action: str, on_delivered=None) -> bool:
+        """Log a delivered attempt"""
+        log_entry = job['log_entry']
+        email = job['contact']['email']
+        job.pop('outgoing', None)
+        log_entry['smtp_code'] = log_entry['error'] = None
+        if test_mode:
+            print(f"🧪 TEST MODE: Email would be sent")
+            print(f"   Subject: {job['subject']}")
+            print(f"   Attachments: {len(job['attachments'])}")
+            print(f"   Template language: {job['language']}")
+            log_entry['status'] = 'test_success'
+            return True
 
-        attachment.add_header('Content-Disposition', f'attachment; filename="{filename}"')
-        msg.attach(attachment)
+        print(f"✅ Email {action} successfully to {email}")
+        log_entry['status'] = 'success'
+        if on_delivered:
+            on_delivered(email)
+        return True
+
+    @staticmethod
+    def _print_summary(stats: Dict):
+        """Print the campaign summary from a run's statistics"""
+        print(f"\n📊 CAMPAIGN SUMMARY")
+        print(f"📋 Contacts read: {stats['total_contacts']}")
+        if stats['invalid_emails'] or stats['duplicate_emails']:
+            print(f"🚫 Rejected: {stats['invalid_emails']} invalid, {stats['duplicate_emails']} duplicate addresses")
+        if stats['suppressed']:
+            print(f"🚫 Suppressed: {stats['suppressed']}")
+        if stats['skipped_already_sent']:
+            print(f"📒 Skipped (already sent): {stats['skipped_already_sent']}")
+        print(f"✅ Successful sends: {stats['successful_sends']}")
+        print(f"❌ Failed sends: {stats['failed_sends']}")
+        print(f"🌐 Languages used: {', '.join(stats['language_statistics'].keys())}")
+        for lang, lang_stats in stats['language_statistics'].items():
+            print(f"   {lang.upper()}: {lang_stats['successful']}/{lang_stats['attempted']} successful")
+        for stage, timing in stats['stage_timings'].items():
+            print(f"⏱️ {stage}: p50 {timing['p50'] * 1000:.1f} ms, p95 {timing['p95'] * 1000:.1f} ms, "
+                  f"max {timing['max'] * 1000:.1f} ms ({timing['count']}x)")
+        print(f"📅 Completed at: {stats['completion_time']}")
 
     def run_campaign(self, 
-                    contacts_file: str,
-                    global_vars: Dict,
+                    contacts: Union[str, pd.DataFrame, Iterable[Mapping]] = None,
+                    global_vars: Dict = None,
                     attachments_config: Dict = None,
                     send_limit: int = 5,
                     delay_min: int = 30,
                     delay_max: int = 60,
                     test_mode: bool = False,
-                    default_language: str = "en") -> Dict:
+                    default_language: str = "en",
+                    max_workers: int = 1,
+                    journal: Union[str, SendJournal] = None,
+                    campaign_id: str = "default",
+                    rate_limiter: RateLimiter = None,
+                    languages: List[str] = None,
+                    control: CampaignControl = None,
+                    on_progress: Callable[[Dict], None] = None,
+                    broadcast: bool = False,
+                    batch_size: int = BROADCAST_BATCH_SIZE,
+                    metrics_file: str = None,
+                    metrics_port: int = None,
+                    validate: bool = True,
+                    suppression: SuppressionList = None,
+                    retry_policy: RetryPolicy = None,
+                    build_workers: int = 0,
+                    profile: bool = False,
+                    profile_dir: str = PROFILE_DIR,
+                    contacts_file: str = None) -> Dict:
         """
         Run email campaign
         
         Args:
-            contacts_file: Path to contacts CSV/Excel file
+            contacts: Path to contacts CSV/Excel file, a DataFrame, or an iterable
+                of contact mappings
             global_vars: Global variables (sender info, etc.)
             attachments_config: Configuration for attachments
             send_limit: Maximum emails to send per session
             delay_min/max: Delay between emails (seconds)
             test_mode: If True, don't actually send emails
             default_language: Default language if not specified in contact data
+            max_workers: Number of concurrent sending workers, each with its own
+                SMTP session (1 = sequential)
+            journal: Send journal (or path to its SQLite file); recipients already
+                delivered under campaign_id are skipped and new deliveries recorded
+            campaign_id: Campaign identifier in the send journal
+            rate_limiter: Pacing for send starts (defaults to a delay_min..delay_max
+                interval between sends); not applied in test mode
+            languages: Target languages for a multi-language campaign; every contact
+                is sent once per language, with send_limit and the journal applied
+                to each language separately (journal ids are "<campaign_id>/<lang>")
+            control: Pause/cancel switch checked before every send
+            on_progress: Called with a delivery event (email, name, language, status)
+                after every send attempt; may be called from worker threads
+            broadcast: Send identical messages once per batch of up to batch_size
+                recipients (BCC-style, pipelined RCPT TO); only used when no
+                template placeholder depends on the contact, sequential only
+            batch_size: Recipients per broadcast transaction
+            metrics_file: Write the stage timings and send counters to this file in
+                OpenMetrics text format when the campaign ends
+            metrics_port: Serve live OpenMetrics on http://127.0.0.1:<port>/metrics
+                while the campaign runs
+            validate: Drop contacts with a missing or malformed address and repeated
+                addresses before rendering (see ContactValidator); the rejected
+                rows are returned in stats['rejected_contacts']
+            suppression: Contacts whose address is in this list are dropped before
+                rendering and counted in stats['suppressed']
+            retry_policy: Backoff for transient failures (4xx replies, dropped
+                connections); deferred recipients are retried from a queue while
+                other recipients keep flowing (defaults to RetryPolicy())
+            build_workers: Build messages (MIME, attachment encoding) in this many
+                processes ahead of sending, for campaigns with per-contact or
+                large attachments; 0 builds each message in the sending thread.
+                Not used by broadcast campaigns
+            profile: Run under cProfile and tracemalloc; the .prof file and an
+                allocations report are saved to profile_dir and summarized in
+                stats['profile']
+            profile_dir: Where profiled runs save their reports
+            contacts_file: Deprecated keyword name of contacts
             
         Returns:
-            Campaign statistics
+            Campaign statistics; total_contacts counts the contacts read, which
+            stops early once send_limit is reached. stage_timings holds count,
+            total, p50, p95 and max seconds per stage (contact_load,
+            language_resolution, render, mime_build, connect, tls, login,
+            envelope, data, pacing_wait)
         """
-        
-        # Load contacts
+        if contacts_file is not None:
+            if contacts is not None:
+                raise TypeError("run_campaign() got both contacts and contacts_file")
+            warnings.warn("run_campaign(contacts_file=...) is deprecated, use contacts=...",
+                          DeprecationWarning, stacklevel=2)
+            contacts = contacts_file
+        for name, value in (('contacts', contacts), ('global_vars', global_vars)):
+            if value is None:
+                raise TypeError(f"run_campaign() missing required argument: '{name}'")
+
+        profiler = CampaignProfiler(profile_dir, campaign_id) if profile else None
+        if profiler:
+            profiler.start()
+        try:
+            stats = self._run_campaign(contacts, global_vars, attachments_config, send_limit, delay_min, delay_max,
+                                       test_mode, default_language, max_workers, journal, campaign_id,
+                                       rate_limiter, languages, control, on_progress, broadcast, batch_size,
+                                       metrics_file, metrics_port, validate, suppression,
+                                       retry_policy, build_workers, profiler)
+        finally:
+            report = profiler.stop() if profiler else None
+        if report and 'error' not in stats:
+            stats['profile'] = report
+        return stats
+
+    async def run_campaign_async(self,
+                                 contacts: Union[str, pd.DataFrame, Iterable[Mapping]],
+                                 global_vars: Dict,
+                                 attachments_config: Dict = None,
+                                 send_limit: int = 5,
+                                 delay_min: int = 30,
+                                 delay_max: int = 60,
+                                 test_mode: bool = False,
+                                 default_language: str = "en",
+                                 concurrency: int = 10,
+                                 journal: Union[str, SendJournal] = None,
+                                 campaign_id: str = "default",
+                                 rate_limiter: RateLimiter = None,
+                                 on_progress: Callable[[Dict], None] = None,
+                                 metrics_file: str = None,
+                                 metrics_port: int = None,
+                                 validate: bool = True,
+                                 suppression: SuppressionList = None,
+                                 retry_policy: RetryPolicy = None) -> Dict:
+        """
+        Run email campaign on asyncio, with many SMTP conversations in one thread
+
+        Every recipient is a task that holds an SMTP session only while it talks
+        to the server; pacing and retry backoff are asyncio.sleep, so thousands
+        of deliveries can wait for their slot without a thread each. Contacts
+        are loaded, validated, rendered and built as in run_campaign, on the
+        event loop between sends. Transports other than SMTP (SpoolTransport)
+        are called in a worker thread.
+
+        Cancelling the task stops the campaign: deliveries in progress are
+        cancelled, sessions are closed and CancelledError propagates. Sends
+        that completed are in the journal.
+
+        Args:
+            concurrency: Maximum SMTP sessions (deliveries talking to the server) at once
+            others: As for run_campaign; campaigns run as a single language lane,
+                without broadcast batching
+
+        Returns:
+            Campaign statistics, as returned by run_campaign
+        """
+        metrics = StageMetrics()
+        loaded = self._open_contacts(contacts, metrics)
+        if isinstance(loaded, dict):
+            return loaded
+        contact_chunks, first_chunk, available_languages = loaded
+
+        run = _CampaignRun(self, metrics, campaign_id, journal, validate, suppression, attachments_config,
+                           on_progress)
+        delivered = run.load_delivered(campaign_id)
+        counts = run.counts
+        retried = 0
+        flight = {'jobs': 0, 'deferred': 0}  # deliveries started and not finished, and those in backoff
+
+        def limit_reached():
+            return counts['successful'] >= send_limit
+
+        def unsent(chunks):
+            for chunk in chunks:
+                for start in range(0, len(chunk), RENDER_CHUNK_SIZE):
+                    rows = chunk.iloc[start:start + RENDER_CHUNK_SIZE]
+                    if delivered:
+                        already_sent = _delivered_mask(rows['email'], delivered)
+                        counts['skipped'] += int(already_sent.sum())
+                        rows = rows[~already_sent]
+                    yield rows
+
+        renderer = TemplateRenderer(global_vars)
+        rendered = self._iter_rendered(unsent(run.read_contacts(first_chunk, contact_chunks, limit_reached)),
+                                       renderer, default_language, metrics)
+
+        if rate_limiter is None:
+            rate_limiter = RateLimiter.from_delays(delay_min, delay_max)
+
+        async def pace():
+            if test_mode:
+                return True
+            with metrics.time('pacing_wait'):
+                delay = rate_limiter.reserve()
+                if delay:
+                    print(f"⏳ Waiting {delay:.0f} seconds...")
+                    await asyncio.sleep(delay)
+            if delay is None:
+                print(f"🛑 Daily sending quota of {rate_limiter.per_day} reached")
+                return False
+            return True
+
+        # SMTP sessions live on this event loop; other transports block, so they get a thread
+        pool = None
+        if not test_mode and isinstance(self.transport, SMTPTransport):
+            pool = AsyncSMTPPool(self.smtp_server, self.smtp_port, self.email, self.password,
+                                 self.smtp_pool.use_tls, self.smtp_pool.timeout, metrics)
+        transport = self.null_transport if test_mode else self.transport
+
+        async def send(message):
+            if pool:
+                return await pool.send(message)
+            if test_mode:
+                return transport.send(message)
+            return await asyncio.to_thread(transport.send, message)
+
+        policy = retry_policy or RetryPolicy()
+        sessions = asyncio.Semaphore(concurrency)
+        slots = asyncio.Condition()  # notified whenever flight changes
+
+        async def update_flight(key, amount):
+            async with slots:
+                flight[key] += amount
+                slots.notify_all()
+
+        async def deliver(job):
+            # One recipient from its first attempt to the final outcome; the backoff
+            # before a retry does not hold a session
+            nonlocal retried
+            while True:
+                async with sessions:
+                    try:
+                        await send(self._start_attempt(job))
+                    except Exception as e:
+                        sent = self._attempt_failed(job, e)
+                    else:
+                        sent = self._attempt_succeeded(job, test_mode, transport.action)
+                if sent and run.journal and not test_mode:
+                    # The commit (an fsync) runs in a thread, so the other deliveries keep going
+                    email = run.mark_delivered(campaign_id, job['contact']['email'])
+                    await asyncio.to_thread(run.journal.record, campaign_id, email)
+                if sent is not None:
+                    break
+                if job['attempts'] >= policy.max_attempts:
+                    print(f"❌ Giving up on {job['contact']['email']} after {job['attempts']} attempts")
+                    job['log_entry']['status'] = 'failed'
+                    job.pop('outgoing', None)
+                    sent = False
+                    break
+                delay = policy.delay(job['attempts'])
+                print(f"⏳ Retrying {job['contact']['email']} in {delay:.0f} seconds...")
+                await update_flight('deferred', 1)
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    await update_flight('deferred', -1)
+                if not await pace():
+                    print(f"⏳ {job['contact']['email']} is still deferred and will not be retried")
+                    job.pop('outgoing', None)
+                    sent = False
+                    break
+                retried += 1
+            run.record(job, sent)
+            run.notify(job)
+            await update_flight('jobs', -1)
+
+        def can_start():
+            # Started deliveries hold their place against send_limit until they are
+            # resolved; at most `concurrency` of them (besides backoffs) at a time
+            return limit_reached() or (counts['successful'] + flight['jobs'] < send_limit
+                                       and flight['jobs'] - flight['deferred'] < concurrency)
+
+        run.serve_metrics(metrics_port)
+
+        tasks = set()
+        try:
+            for row in rendered:
+                async with slots:
+                    await slots.wait_for(can_start)
+                    if limit_reached():
+                        break
+                    flight['jobs'] += 1
+                if not await pace():
+                    flight['jobs'] -= 1
+                    break
+                task = asyncio.create_task(deliver(run.prepare(*row)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            # On cancellation (or an error) deliveries in progress are cancelled with the campaign
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            rendered.close()
+            if pool:
+                await pool.close()
+            run.close()
+
+        if limit_reached():
+            print(f"🛑 Send limit of {send_limit} reached")
+
+        return run.summary(
+            metrics_file,
+            test_mode=test_mode,
+            cancelled=False,
+            available_templates=available_languages,
+            default_language_used=default_language,
+            target_languages=None,
+            pacing_wait_seconds=round(rate_limiter.waited, 3),
+            retries=retried,
+            broadcast=False
+        )
+
+    def _account_bot(self, account: SenderAccount) -> 'EmailCampaignBot':
+        """Bot sending as account, sharing this bot's templates"""
+        bot = EmailCampaignBot(account.email, account.password, account.smtp_server, account.smtp_port,
+                               use_tls=account.use_tls, transport=account.transport)
+        bot.templates = self.templates
+        bot.subject_templates = self.subject_templates
+        bot._compiled_templates = self._compiled_templates
+        return bot
+
+    def run_sharded_campaign(self,
+                             contacts: Union[str, pd.DataFrame, Iterable[Mapping]],
+                             global_vars: Dict,
+                             accounts: List[SenderAccount] = None,
+                             shard_by: str = "round_robin",
+                             send_limit: int = 5,
+                             delay_min: int = 30,
+                             delay_max: int = 60,
+                             validate: bool = True,
+                             on_progress: Callable[[Dict], None] = None,
+                             **options) -> Dict:
+        """
+        Run one campaign over several sender accounts in parallel
+
+        Every account gets its own SMTP sessions, pacing (per_minute or the
+        delays) and daily quota, and sends its shard of the contacts through
+        run_campaign in its own thread. The contacts are read and validated
+        once and handed to the accounts chunk by chunk.
+
+        Args:
+            contacts: As for run_campaign
+            global_vars: Global variables (sender info, etc.)
+            accounts: Sender accounts (defaults to the bot's accounts)
+            shard_by: round_robin, weighted or domain (see shard_contacts)
+            send_limit: Sends for the whole campaign, split between the accounts
+                by weight (unless an account sets its own send_limit)
+            delay_min/max: Delay between emails of an account without per_minute
+            validate: Validate and deduplicate addresses before sharding, so a
+                repeated address is dropped even when it falls in another shard
+            on_progress: As for run_campaign; events also carry the 'account'
+            **options: Other run_campaign options (attachments_config, test_mode,
+                max_workers per account, journal, control, retry_policy, ...)
+
+        Returns:
+            Combined campaign statistics, with per-account results in 'accounts'
+            and the errors of accounts that failed in 'account_errors'
+        """
+        accounts = accounts or self.accounts
+        if not accounts:
+            error_msg = "No sender accounts configured"
+            print(f"❌ {error_msg}")
+            return {"error": error_msg}
+        if shard_by not in SHARD_STRATEGIES:
+            error_msg = f"Unknown shard strategy '{shard_by}' (use one of {', '.join(SHARD_STRATEGIES)})"
+            print(f"❌ {error_msg}")
+            return {"error": error_msg}
+        for option in ('rate_limiter', 'metrics_port', 'metrics_file', 'profile'):
+            if options.pop(option, None):
+                print(f"ℹ️ {option} is not used by sharded campaigns")
+
+        # Largest-remainder split of send_limit by weight
+        weights = [account.weight for account in accounts]
+        shares = [send_limit * weight / sum(weights) for weight in weights]
+        limits = [int(share) for share in shares]
+        for i in sorted(range(len(accounts)), key=lambda i: limits[i] - shares[i])[:send_limit - sum(limits)]:
+            limits[i] += 1
+        limits = [account.send_limit or limit for account, limit in zip(accounts, limits)]
+
+        # The contacts are read and validated once, by a producer thread that hands
+        # every account its shard through a bounded queue
         try:
-            if contacts_file.endswith('.xlsx'):
-                df = pd.read_excel(contacts_file)
+            contact_chunks = self.iter_contact_chunks(contacts)
+            first_chunk = next(contact_chunks, None)
+        except Exception as e:
+            print(f"❌ Error loading contacts: {e}")
+            return {"error": str(e)}
+        missing_columns = [col for col in ['name', 'email']
+                           if first_chunk is None or col not in first_chunk.columns]
+        if missing_columns:
+            contact_chunks.close()
+            error_msg = f"Missing required columns: {missing_columns}"
+            print(f"❌ {error_msg}")
+            return {"error": error_msg}
+
+        validator = ContactValidator() if validate else None
+        shard_queues = [queue.Queue(maxsize=SHARD_QUEUE_CHUNKS) for _ in accounts]
+        stopped = [threading.Event() for _ in accounts]  # the account no longer reads its shard
+        counts = {'read': 0}
+        load_errors = []
+
+        def offer(i, item):
+            # Blocks while the account's queue is full, unless the account has stopped
+            while not stopped[i].is_set():
+                try:
+                    shard_queues[i].put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def produce():
+            position = 0
+            try:
+                for chunk in chain([first_chunk], contact_chunks):
+                    counts['read'] += len(chunk)
+                    if validator:
+                        chunk = validator.filter(chunk)
+                    assignment = shard_contacts(chunk, position, weights, shard_by)
+                    position += len(chunk)
+                    for i in range(len(accounts)):
+                        offer(i, chunk[assignment == i])
+                    if all(event.is_set() for event in stopped):
+                        return
+            except Exception as e:
+                print(f"❌ Error loading contacts: {e}")
+                load_errors.append(str(e))
+            finally:
+                contact_chunks.close()
+                for i in range(len(accounts)):
+                    offer(i, None)
+
+        def shard(i):
+            try:
+                while True:
+                    chunk = shard_queues[i].get()
+                    if chunk is None:
+                        if load_errors:
+                            raise RuntimeError(load_errors[0])
+                        return
+                    yield chunk
+            finally:
+                stopped[i].set()
+
+        def run_account(i):
+            account = accounts[i]
+            progress = (lambda event: on_progress(dict(event, account=account.email))) if on_progress else None
+            bot = self._account_bot(account)
+            try:
+                print(f"👤 {account.email}: up to {limits[i]} emails")
+                return bot.run_campaign(shard(i), global_vars, send_limit=limits[i], validate=False,
+                                        rate_limiter=account.rate_limiter(delay_min, delay_max),
+                                        on_progress=progress, **options)
+            except Exception as e:
+                print(f"❌ {account.email}: campaign failed: {e}")
+                return {"error": str(e)}
+            finally:
+                stopped[i].set()
+                bot.close()
+
+        print(f"🔀 Sharding contacts over {len(accounts)} accounts ({shard_by})")
+        producer = threading.Thread(target=produce, daemon=True, name="campaign-shards")
+        producer.start()
+        with ThreadPoolExecutor(max_workers=len(accounts), thread_name_prefix="campaign-account") as executor:
+            results = list(executor.map(run_account, range(len(accounts))))
+        producer.join()
+
+        succeeded = [stats for stats in results if 'error' not in stats]
+        if not succeeded:
+            return {"error": results[0]['error']}
+
+        language_stats = {}
+        for stats in succeeded:
+            for lang, lang_stats in stats['language_statistics'].items():
+                merged = language_stats.setdefault(lang, {'attempted': 0, 'successful': 0, 'failed': 0})
+                for key in merged:
+                    merged[key] += lang_stats[key]
+
+        def total(key):
+            return sum(stats.get(key, 0) for stats in succeeded)
+
+        rejected = validator.report() if validator else None
+        first = succeeded[0]
+        stats = {
+            'total_contacts': counts['read'],
+            'skipped_already_sent': total('skipped_already_sent'),
+            'suppressed': total('suppressed'),
+            'campaign_id': first['campaign_id'],
+            'successful_sends': total('successful_sends'),
+            'failed_sends': total('failed_sends'),
+            'retries': total('retries'),
+            'completion_time': datetime.now().isoformat(),
+            'test_mode': first['test_mode'],
+            'cancelled': any(stats['cancelled'] for stats in succeeded),
+            'campaign_log': CampaignLog.concat(stats['campaign_log'] for stats in succeeded),
+            'language_statistics': language_stats,
+            'available_templates': first['available_templates'],
+            'default_language_used': first['default_language_used'],
+            'target_languages': first['target_languages'],
+            'invalid_emails': validator.counts['missing'] + validator.counts['invalid'] if validator else 0,
+            'duplicate_emails': validator.counts['duplicate'] if validator else 0,
+            'rejected_contacts': rejected,
+            'shard_by': shard_by,
+            'account_errors': {account.email: result['error']
+                               for account, result in zip(accounts, results) if 'error' in result},
+            'accounts': {
+                account.email: {
+                    'send_limit': limit,
+                    **({'error': result['error']} if 'error' in result else {
+                        'contacts': result['total_contacts'],
+                        'successful_sends': result['successful_sends'],
+                        'failed_sends': result['failed_sends'],
+                        'pacing_wait_seconds': result['pacing_wait_seconds'],
+                        'stage_timings': result['stage_timings']
+                    })
+                } for account, limit, result in zip(accounts, limits, results)
+            }
+        }
+
+        print(f"\n📊 SHARDED CAMPAIGN SUMMARY")
+        for email, account_stats in stats['accounts'].items():
+            if 'error' in account_stats:
+                print(f"❌ {email}: {account_stats['error']}")
             else:
-                df = pd.read_csv(contacts_file)
+                print(f"👤 {email}: {account_stats['successful_sends']} sent, {account_stats['failed_sends']} failed")
+        print(f"✅ Successful sends: {stats['successful_sends']}")
+        print(f"❌ Failed sends: {stats['failed_sends']}")
+
+        return stats
+
+    def _open_contacts(self, contacts, metrics: StageMetrics):
+        """
+        Start streaming contacts for a campaign run
+
+        Returns:
+            (contact chunks, first chunk, available template languages), or an
+            error dict when the contacts cannot be read, lack the required
+            columns or no templates are loaded
+        """
+        # Stream contacts: sending starts after the first chunk and reading
+        # stops once the send limit is reached
+        try:
+            contact_chunks = self.iter_contact_chunks(contacts)
+            with metrics.time('contact_load'):
+                first_chunk = next(contact_chunks, None)
         except Exception as e:
             print(f"❌ Error loading contacts: {e}")
             return {"error": str(e)}
 
-        print(f"📋 {len(df)} contacts loaded from {contacts_file}")
+        source = contacts if isinstance(contacts, (str, os.PathLike)) else type(contacts).__name__
+        print(f"📋 Streaming contacts from {source}")
 
         # Validate required columns
         required_columns = ['name', 'email']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        columns = first_chunk.columns if first_chunk is not None else []
+        missing_columns = [col for col in required_columns if col not in columns]
         if missing_columns:
             error_msg = f"Missing required columns: {missing_columns}"
             print(f"❌ {error_msg}")
+            contact_chunks.close()
             return {"error": error_msg}
 
         # Check available templates
@@ -345,127 +3495,457 @@ class EmailCampaignBot:
         if not available_languages:
             error_msg = "No email templates loaded"
             print(f"❌ {error_msg}")
+            contact_chunks.close()
             return {"error": error_msg}
 
         print(f"📝 Available templates: {', '.join(available_languages)}")
+        return contact_chunks, first_chunk, available_languages
 
-        successful_sends = 0
-        failed_sends = 0
-        campaign_log = []
-        language_stats = {}
+    def _run_campaign(self, 
+                    contacts: Union[str, pd.DataFrame, Iterable[Mapping]],
+                    global_vars: Dict,
+                    attachments_config: Dict = None,
+                    send_limit: int = 5,
+                    delay_min: int = 30,
+                    delay_max: int = 60,
+                    test_mode: bool = False,
+                    default_language: str = "en",
+                    max_workers: int = 1,
+                    journal: Union[str, SendJournal] = None,
+                    campaign_id: str = "default",
+                    rate_limiter: RateLimiter = None,
+                    languages: List[str] = None,
+                    control: CampaignControl = None,
+                    on_progress: Callable[[Dict], None] = None,
+                    broadcast: bool = False,
+                    batch_size: int = BROADCAST_BATCH_SIZE,
+                    metrics_file: str = None,
+                    metrics_port: int = None,
+                    validate: bool = True,
+                    suppression: SuppressionList = None,
+                    retry_policy: RetryPolicy = None,
+                    build_workers: int = 0,
+                    profiler: CampaignProfiler = None) -> Dict:
+        """Body of run_campaign (profiler, if given, is only used to profile worker threads)"""
+        metrics = StageMetrics()
+        loaded = self._open_contacts(contacts, metrics)
+        if isinstance(loaded, dict):
+            return loaded
+        contact_chunks, first_chunk, available_languages = loaded
 
-        for index, contact in df.iterrows():
-            if successful_sends >= send_limit:
-                print(f"🛑 Send limit of {send_limit} reached")
-                break
+        # Multi-language campaigns run as one lane per target language over a single
+        # pass of the contacts; a regular campaign is a single lane (None)
+        if languages:
+            lanes = [lang for lang in languages if lang in self.templates]
+            for lang in languages:
+                if lang not in self.templates:
+                    print(f"⚠️ No template for language '{lang}', skipping")
+            if not lanes:
+                error_msg = f"No templates for requested languages: {languages}"
+                print(f"❌ {error_msg}")
+                contact_chunks.close()
+                return {"error": error_msg}
+            print(f"🌐 Target languages: {', '.join(lanes)}")
+        else:
+            lanes = [None]
 
-            # Determine language with fallback logic
-            contact_dict = contact.to_dict()
-            
-            # Priority: contact language > default language > first available template
-            language = contact_dict.get('language', default_language)
-            
-            if language not in self.templates:
-                # Try default language
-                if default_language in self.templates:
-                    language = default_language
-                    print(f"⚠️ Language '{contact_dict.get('language', 'None')}' not available for {contact_dict.get('name', 'Unknown')}, using {default_language}")
-                else:
-                    # Use first available template
-                    language = available_languages[0]
-                    print(f"⚠️ Neither specified nor default language available for {contact_dict.get('name', 'Unknown')}, using {language}")
-            
-            # Track language usage
-            if language not in language_stats:
-                language_stats[language] = {'attempted': 0, 'successful': 0, 'failed': 0}
-            language_stats[language]['attempted'] += 1
-            
-            template = self.templates[language]
-            
-            # Personalize message
-            message = self.personalize_message(template, contact_dict, global_vars)
-            
-            # Generate subject
-            subject = self.generate_subject(contact_dict, language, global_vars)
-            
-            # Prepare attachments
-            attachments = []
-            
-            # Add language-specific attachments
-            if attachments_config and 'by_language' in attachments_config:
-                lang_attachments = attachments_config['by_language'].get(language, [])
-                attachments.extend(lang_attachments)
-            
-            # Add common attachments
-            if attachments_config and 'common' in attachments_config:
-                attachments.extend(attachments_config['common'])
-            
-            # Add contact-specific attachments
-            if 'attachment' in contact_dict and pd.notna(contact_dict['attachment']):
-                attachments.append(contact_dict['attachment'])
-
-            # Log campaign entry
-            log_entry = {
-                'timestamp': datetime.now().isoformat(),
-                'name': contact_dict.get('name', 'Unknown'),
-                'email': contact_dict.get('email', 'Unknown'),
-                'language': language,
-                'original_language': contact_dict.get('language', 'Not specified'),
-                'subject': subject,
-                'attachments_count': len(attachments),
-                'template_used': language in self.templates
-            }
+        def lane_of(language):
+            return language if languages else None
 
-            print(f"\n📤 Sending to {contact_dict.get('name', 'Unknown')} ({contact_dict.get('email', 'Unknown')}) - Language: {language.upper()}")
-            
-            if test_mode:
-                print(f"🧪 TEST MODE: Email would be sent")
-                print(f"   Subject: {subject}")
-                print(f"   Attachments: {len(attachments)}")
-                print(f"   Template language: {language}")
-                log_entry['status'] = 'test_success'
-                successful_sends += 1
-                language_stats[language]['successful'] += 1
+        def journal_id(lane):
+            return campaign_id if lane is None else f"{campaign_id}/{lane}"
+
+        run = _CampaignRun(self, metrics, campaign_id, journal, validate, suppression, attachments_config,
+                           on_progress)
+        delivered = {lane: run.load_delivered(journal_id(lane)) for lane in lanes}
+
+        def on_delivered(email, language):
+            key = journal_id(lane_of(language))
+            run.journal.record(key, run.mark_delivered(key, email))
+
+        counts = run.counts
+        successes = Counter()  # successful sends per lane, checked against send_limit
+
+        def lane_full(lane):
+            return successes[lane] >= send_limit
+
+        def lane_batches(chunks):
+            # Each render batch is expanded into one (contact, language) batch per
+            # open lane, so contacts are read and sliced once for all languages
+            for chunk in chunks:
+                for start in range(0, len(chunk), RENDER_CHUNK_SIZE):
+                    batch = chunk.iloc[start:start + RENDER_CHUNK_SIZE]
+                    for lane in lanes:
+                        if lane_full(lane):
+                            continue
+                        rows = batch if lane is None else batch.assign(language=lane)
+                        if delivered[lane]:
+                            already_sent = _delivered_mask(rows['email'], delivered[lane])
+                            counts['skipped'] += int(already_sent.sum())
+                            rows = rows[~already_sent]
+                        yield rows
+
+        # Global and per-language variables are resolved once for the whole campaign,
+        # contacts are rendered lazily in column-wise chunks
+        renderer = TemplateRenderer(global_vars)
+        contact_stream = run.read_contacts(first_chunk, contact_chunks,
+                                           lambda: all(lane_full(lane) for lane in lanes))
+        rendered = self._iter_rendered(lane_batches(contact_stream), renderer, default_language, metrics)
+        prepare, notify, record = run.prepare, run.notify, run.record
+
+        # Transient failures are deferred and retried with backoff; a deferred job
+        # keeps its place against send_limit until it is delivered or given up
+        retries = RetryQueue(retry_policy or RetryPolicy())
+
+        def deliver(job):
+            callback = (lambda email: on_delivered(email, job['language'])) if run.journal else None
+            sent = self._deliver(job, test_mode, callback)
+            if sent is None and job['attempts'] >= retries.policy.max_attempts:
+                print(f"❌ Giving up on {job['contact']['email']} after {job['attempts']} attempts")
+                job['log_entry']['status'] = 'failed'
+                job.pop('outgoing', None)
+                sent = False
+            if sent is not None:
+                notify(job)
+            return sent
+
+        def abandon(job):
+            print(f"⏳ {job['contact']['email']} is still deferred and will not be retried")
+            job.pop('outgoing', None)
+            notify(job)
+
+        def hold(seconds):
+            # Wait for the next deferred job to be due; False once the campaign is cancelled
+            print(f"⏳ Next retry in {seconds:.0f} seconds...")
+            if control is None:
+                time.sleep(seconds)
+                return True
+            if control.interrupt.wait(seconds):
+                return control.checkpoint()
+            return True
+
+        # Broadcast: identical messages are built once and sent to batches of recipients
+        if broadcast:
+            blockers = self.broadcast_blockers(renderer, lanes if languages else available_languages,
+                                               first_chunk.columns)
+            if blockers:
+                print(f"⚠️ Messages depend on the contact ({'; '.join(blockers)}), sending individually")
+                broadcast = False
+            elif max_workers > 1:
+                print("ℹ️ Broadcast batches are sent one at a time, max_workers is ignored")
+        broadcast_messages = {}
+
+        # Messages built ahead in builder processes: the sending loops get (row..., message)
+        if build_workers and not broadcast:
+            print(f"🏗️ Building messages in {build_workers} processes")
+            rendered = self._iter_built(rendered, attachments_config, build_workers, metrics)
+
+        def broadcast_batches(rows):
+            # Rows with the same language, subject and body wait until their batch is
+            # full (or the send limit is reached); partial batches go out at the end
+            pending = {}
+            for row in rows:
+                key = tuple(row[2:5])
+                batch = pending.setdefault(key, [])
+                batch.append(row)
+                if len(batch) >= min(batch_size, send_limit - successes[lane_of(row[2])]):
+                    yield pending.pop(key)
+            yield from pending.values()
+
+        def deliver_batch(jobs):
+            first = jobs[0]
+            key = (first['language'], first['subject'], first['message'])
+            if key not in broadcast_messages:
+                with metrics.time('mime_build'):
+                    broadcast_messages[key] = self.build_message(BROADCAST_TO, first['subject'], first['message'],
+                                                                 first['attachments'])
+            emails = [str(job['contact']['email']) for job in jobs]
+            transport = self.null_transport if test_mode else self.transport
+            print(f"\n📤 Broadcasting to {len(emails)} recipients - Language: {first['language'].upper()}")
+            # failures: email -> (transient, smtp_code, reply)
+            try:
+                refused = transport.send(OutgoingMessage(self.email, emails, broadcast_messages[key].segments)) or {}
+                failures = {email: (code is not None and 400 <= code < 500, code, reply)
+                            for email, (code, reply) in refused.items()}
+                print(f"✅ Email {transport.action} successfully to {len(emails) - len(refused)} recipients")
+            except smtplib.SMTPRecipientsRefused as e:
+                failures = {email: (code is not None and 400 <= code < 500, code, reply)
+                            for email, (code, reply) in e.recipients.items()}
+                print(f"❌ All {len(emails)} recipients refused")
+            except Exception as e:
+                transient, code = classify_smtp_error(e)
+                failures = dict.fromkeys(emails, (transient, code, _smtp_error_text(e)))
+                print(f"{'⏳ Temporary failure' if transient else '❌ Error'} broadcasting to {len(emails)} recipients: {e}")
+
+            results = []
+            for job, email in zip(jobs, emails):
+                log_entry = job['log_entry']
+                log_entry['attempts'] = job['attempts'] = job.get('attempts', 0) + 1
+                sent = True
+                if email in failures:
+                    transient, log_entry['smtp_code'], reply = failures[email]
+                    log_entry['error'] = reply.decode(errors='replace') if isinstance(reply, bytes) else reply
+                    sent = None if transient and job['attempts'] < retries.policy.max_attempts else False
+                log_entry['status'] = {True: 'test_success' if test_mode else 'success',
+                                       None: 'deferred', False: 'failed'}[sent]
+                if sent and run.journal and not test_mode:
+                    on_delivered(email, job['language'])
+                if sent is not None:
+                    notify(job)
+                results.append(sent)
+            return results
+
+        # Pacing: every send start takes a slot from the rate limiter
+        if rate_limiter is None:
+            rate_limiter = RateLimiter.from_delays(delay_min, delay_max)
+        if broadcast and rate_limiter.per_day and batch_size > rate_limiter.per_day:
+            print(f"ℹ️ batch_size {batch_size} is above the daily quota, sending batches of {rate_limiter.per_day}")
+            batch_size = rate_limiter.per_day
+
+        def pace(weight=1):
+            while True:
+                if control and not control.checkpoint():
+                    print("🛑 Campaign cancelled")
+                    return False
+                if test_mode:
+                    return True
+                with metrics.time('pacing_wait'):
+                    acquired = rate_limiter.acquire(control.interrupt if control else None, weight)
+                if acquired:
+                    return True
+                if not (control and control.interrupt.is_set()):
+                    print(f"🛑 Daily sending quota of {rate_limiter.per_day} reached")
+                    return False
+                # Paused or cancelled during the wait: re-check the control
+
+        run.serve_metrics(metrics_port)
+
+        deferred = Counter()  # deferred jobs per lane
+
+        def finish(job, sent):
+            lane = lane_of(job['language'])
+            if sent is None:
+                deferred[lane] += 1
+                retries.push(job)
+                return
+            if sent:
+                successes[lane] += 1
+            record(job, sent)
+
+        def send_retries(block):
+            # Deliver the deferred jobs that are due; with block, wait until
+            # every deferred job is resolved. False stops the campaign
+            while len(retries):
+                wait = retries.wait_time()
+                if wait > 0:
+                    if not block:
+                        return True
+                    if not hold(wait):
+                        return False
+                    continue
+                job = retries.pop_due()
+                if not pace():
+                    retries.push(job, 0)
+                    return False
+                deferred[lane_of(job['language'])] -= 1
+                finish(job, deliver(job))
+            return True
+
+        try:
+            if max_workers > 1 and not broadcast:
+                self._run_concurrent(rendered, prepare, deliver, record, send_limit,
+                                     pace, max_workers, lane_of, successes, profiler,
+                                     retries, abandon, control)
             else:
-                if self.send_email(contact_dict['email'], subject, message, attachments):
-                    successful_sends += 1
-                    language_stats[language]['successful'] += 1
-                    log_entry['status'] = 'success'
-                    
-                    # Random delay between sends
-                    if index < len(df) - 1:
-                        delay = random.randint(delay_min, delay_max)
-                        print(f"⏳ Waiting {delay} seconds...")
-                        time.sleep(delay)
+                # Deferred broadcast recipients are retried one by one, with their own message
+                for item in (broadcast_batches(rendered) if broadcast else rendered):
+                    batch = item if broadcast else [item]
+                    lane = lane_of(batch[0][2])
+                    # Deferred jobs hold their slots: wait for them once they could fill the lane
+                    at_capacity = deferred[lane] and successes[lane] + deferred[lane] >= send_limit
+                    if not send_retries(block=at_capacity):
+                        break
+                    batch = batch[:send_limit - successes[lane] - deferred[lane]]
+                    if not batch:
+                        continue
+                    budget = rate_limiter.remaining() if broadcast and not test_mode else None
+                    if budget is not None:
+                        # A batch over the rest of the daily budget sends what the budget allows
+                        # (an empty budget still goes to pace, which reports the quota)
+                        batch = batch[:max(budget, 1)]
+
+                    if not pace(len(batch)):
+                        break
+
+                    jobs = [prepare(*row) for row in batch]
+                    results = deliver_batch(jobs) if broadcast else [deliver(jobs[0])]
+                    for job, sent in zip(jobs, results):
+                        finish(job, sent)
                 else:
-                    failed_sends += 1
-                    language_stats[language]['failed'] += 1
-                    log_entry['status'] = 'failed'
-            
-            campaign_log.append(log_entry)
+                    send_retries(block=True)
+
+                # Jobs still deferred when the campaign stopped (cancel, daily quota)
+                for job in retries.drain():
+                    abandon(job)
+                    record(job, False)
+        finally:
+            # Stop reading the contacts file and close sessions reused across the campaign
+            rendered.close()
+            run.close()
+
+        for lane in lanes:
+            if lane_full(lane):
+                print(f"🛑 Send limit of {send_limit} reached" + (f" for {lane.upper()}" if lane else ""))
 
         # Campaign summary
-        stats = {
-            'total_contacts': len(df),
-            'successful_sends': successful_sends,
-            'failed_sends': failed_sends,
-            'completion_time': datetime.now().isoformat(),
-            'test_mode': test_mode,
-            'campaign_log': campaign_log,
-            'language_statistics': language_stats,
-            'available_templates': available_languages,
-            'default_language_used': default_language
-        }
-        
-        print(f"\n📊 CAMPAIGN SUMMARY")
-        print(f"✅ Successful sends: {successful_sends}")
-        print(f"❌ Failed sends: {failed_sends}")
-        print(f"🌐 Languages used: {', '.join(language_stats.keys())}")
-        for lang, lang_stats in language_stats.items():
-            print(f"   {lang.upper()}: {lang_stats['successful']}/{lang_stats['attempted']} successful")
-        print(f"📅 Completed at: {stats['completion_time']}")
-        
-        return stats
+        extra = {'broadcast_messages_built': len(broadcast_messages)} if broadcast else {}
+        return run.summary(
+            metrics_file,
+            test_mode=test_mode,
+            cancelled=bool(control and control.cancelled),
+            available_templates=available_languages,
+            default_language_used=default_language,
+            target_languages=lanes if languages else None,
+            pacing_wait_seconds=round(rate_limiter.waited, 3),
+            retries=retries.retried,
+            broadcast=broadcast,
+            **extra
+        )
+
+    def _run_concurrent(self, rows, prepare, deliver, record, send_limit: int, pace, max_workers: int,
+                        lane_of, successes: Counter, profiler: CampaignProfiler = None,
+                        retries: RetryQueue = None, abandon=None, control: CampaignControl = None):
+        """
+        Drain rendered jobs with a bounded pool of sending workers
+
+        Jobs are only dispatched while successful + in-flight sends of their lane
+        (see lane_of) stay below send_limit, so the limit is never exceeded and
+        failed sends free up a slot for the next contact exactly like the
+        sequential path. successes is updated per lane as sends complete. pace()
+        (if given) is called before each dispatch and stops the run when it
+        returns False. Outcomes are recorded in dispatch order as soon as all
+        earlier jobs are done, so stats and log match the sequential path.
+        Workers are profiled too when a profiler is given.
+
+        When deliver() returns None the job is deferred to retries: it keeps its
+        in-flight slot and is handed back to the workers once it is due. Jobs
+        still deferred when the run stops are passed to abandon() and recorded
+        as failed.
+        """
+        jobs = queue.Queue()
+        state = threading.Condition()
+        in_flight = Counter()
+        completed = {}  # position -> (outcome, sent) for jobs finished ahead of earlier ones
+        next_to_record = [0]
+
+        previous_concurrency = self.transport.set_concurrency(max_workers)
+
+        def complete(job, sent):
+            # Called with state held
+            lane = lane_of(job['language'])
+            in_flight[lane] -= 1
+            if sent:
+                successes[lane] += 1
+            # Only what record() needs is kept while waiting for earlier jobs
+            outcome = {key: job[key] for key in ('position', 'language', 'log_entry')}
+            completed[outcome['position']] = (outcome, sent)
+            while next_to_record[0] in completed:
+                record(*completed.pop(next_to_record[0]))
+                next_to_record[0] += 1
+            state.notify_all()
+
+        def worker():
+            with profiler.thread() if profiler else nullcontext():
+                work()
+
+        def work():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                try:
+                    sent = deliver(job)
+                except Exception as e:
+                    print(f"❌ Error sending email to {job['contact'].get('email', 'Unknown')}: {e}")
+                    job['log_entry']['status'] = 'failed'
+                    sent = False
+                with state:
+                    if sent is None:
+                        retries.push(job)
+                        state.notify_all()
+                    else:
+                        complete(job, sent)
+
+        def dispatch_retries():
+            # Hand the deferred jobs that are due back to the workers; False stops the run
+            while retries is not None:
+                if control and control.cancelled:
+                    return False
+                job = retries.pop_due()
+                if job is None:
+                    return True
+                if pace is not None and not pace():
+                    retries.push(job, 0)
+                    return False
+                jobs.put(job)
+            return True
+
+        def wait():
+            # Called with state held: until a send completes or is deferred, or a deferred job is due
+            timeout = retries.wait_time() if retries is not None else None
+            state.wait(None if timeout is None else min(timeout, 1.0))
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+        for thread in workers:
+            thread.start()
+
+        try:
+            position = 0
+            stopped = False
+            for row in rows:
+                lane = lane_of(row[2])
+                while True:
+                    if not dispatch_retries():
+                        stopped = True
+                        break
+                    with state:
+                        if successes[lane] + in_flight[lane] < send_limit or not in_flight[lane]:
+                            break
+                        wait()
+                if stopped:
+                    break
+                with state:
+                    if successes[lane] >= send_limit:
+                        continue
+                    in_flight[lane] += 1
+                if pace is not None and not pace():
+                    with state:
+                        in_flight[lane] -= 1
+                    stopped = True
+                    break
+                job = prepare(*row)
+                job['position'] = position
+                position += 1
+                jobs.put(job)
+
+            # Keep retrying deferred jobs until every dispatched job is resolved
+            while not stopped and dispatch_retries():
+                with state:
+                    if not any(in_flight.values()):
+                        break
+                    wait()
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for thread in workers:
+                thread.join()
+            self.transport.set_concurrency(previous_concurrency)
+            if retries is not None:
+                with state:
+                    for job in retries.drain():
+                        if abandon:
+                            abandon(job)
+                        complete(job, False)
 
     def save_templates_to_file(self, filename: str, campaign_type: str = "custom"):
         """Save current templates to JSON file"""
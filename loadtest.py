@@ -0,0 +1,416 @@
+"""
+End-to-end load test against a local SMTP stand-in
+
+Starts an in-process SMTP sink (STARTTLS, AUTH, configurable latency and
+injected failures), runs EmailCampaignBot.run_campaign against it with
+delays disabled and reports messages/sec, send latency percentiles,
+connection counts and bytes on the wire:
+
+    python loadtest.py --contacts 2000 --workers 1 4 8 --latency 0.05
+    python loadtest.py --contacts 500 --temp-fail-rate 0.05 --disconnect-rate 0.01 --output load.json
+
+Nothing leaves the machine: the sink accepts and discards every message.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import shutil
+import socketserver
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmark import GLOBAL_VARS, generate_contacts
+from email_campaign_bot import EmailCampaignBot, OutgoingMessage, RateLimiter, RetryPolicy, Transport
+
+
+def generate_certificate(directory: str) -> tuple:
+    """Self-signed certificate for the sink's STARTTLS, made with the openssl CLI"""
+    if not shutil.which("openssl"):
+        raise RuntimeError("openssl not found: pass --certfile/--keyfile or use --no-tls")
+    certfile = os.path.join(directory, "sink.crt")
+    keyfile = os.path.join(directory, "sink.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """One SMTP session on the sink"""
+
+    def setup(self):
+        super().setup()
+        self.sink = self.server.sink
+        self.tls = False
+        self.authenticated = False
+        self.sink._count('connections')
+
+    def readline(self) -> bytes:
+        line = self.rfile.readline(65536)
+        self.sink._count('bytes_received', len(line))
+        return line
+
+    def reply(self, text: str):
+        data = (text + "\r\n").encode('ascii')
+        self.sink._count('bytes_sent', len(data))
+        self.wfile.write(data)
+
+    def start_tls(self):
+        self.reply("220 Ready to start TLS")
+        self.wfile.flush()
+        self.connection = self.sink.tls_context.wrap_socket(self.connection, server_side=True)
+        self.rfile = self.connection.makefile('rb')
+        self.wfile = self.connection.makefile('wb', buffering=0)
+        self.tls = True
+
+    def authenticate(self, argument: str):
+        parts = argument.split()
+        mechanism = parts[0].upper() if parts else ""
+        if mechanism == "PLAIN":
+            response = parts[1] if len(parts) > 1 else None
+            if response is None:
+                self.reply("334 ")
+                response = self.readline().decode('ascii').strip()
+            _, user, password = base64.b64decode(response).decode('utf-8').split('\0')
+        elif mechanism == "LOGIN":
+            self.reply("334 VXNlcm5hbWU6")
+            user = base64.b64decode(self.readline().strip()).decode('utf-8')
+            self.reply("334 UGFzc3dvcmQ6")
+            password = base64.b64decode(self.readline().strip()).decode('utf-8')
+        else:
+            self.reply("504 Unrecognized authentication type")
+            return
+        if self.sink.credentials and (user, password) != self.sink.credentials:
+            self.sink._count('auth_failures')
+            self.reply("535 Authentication credentials invalid")
+            return
+        self.authenticated = True
+        self.reply("235 Authentication successful")
+
+    def receive_data(self) -> int:
+        size = 0
+        while True:
+            line = self.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                return size
+            size += len(line)
+
+    def handle(self):
+        sink = self.sink
+        self.reply("220 localhost ESMTP load-test sink")
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if sink.command_latency:
+                time.sleep(sink.command_latency)
+
+            if command in ("EHLO", "HELO"):
+                if command == "HELO":
+                    self.reply("250 localhost")
+                    continue
+                extensions = ["8BITMIME", "SMTPUTF8", "PIPELINING", "AUTH PLAIN LOGIN"]
+                if sink.tls_context and not self.tls:
+                    extensions.insert(0, "STARTTLS")
+                self.reply("250-localhost")
+                for extension in extensions[:-1]:
+                    self.reply(f"250-{extension}")
+                self.reply(f"250 {extensions[-1]}")
+            elif command == "STARTTLS" and sink.tls_context and not self.tls:
+                self.start_tls()
+            elif command == "AUTH":
+                self.authenticate(argument)
+            elif command == "MAIL":
+                if sink.credentials and not self.authenticated:
+                    self.reply("530 Authentication required")
+                elif sink._roll(sink.disconnect_rate):
+                    sink._count('disconnects')
+                    self.reply("421 Service not available, closing transmission channel")
+                    return
+                else:
+                    self.reply("250 OK")
+            elif command == "RCPT":
+                if sink._roll(sink.perm_fail_rate):
+                    sink._count('rejected')
+                    self.reply("550 Mailbox unavailable")
+                else:
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.wfile.flush()
+                size = self.receive_data()
+                sink._delay()
+                if sink._roll(sink.temp_fail_rate):
+                    sink._count('deferred')
+                    self.reply("451 Temporary local problem, try again later")
+                else:
+                    sink._count('messages')
+                    sink._count('message_bytes', size)
+                    self.reply("250 Message accepted")
+            elif command == "RSET":
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Async campaigns open hundreds of sessions at once; the default backlog of 5 drops connects
+    request_queue_size = 1024
+
+
+class LocalSMTPServer:
+    """
+    In-process SMTP sink for load tests
+
+    Accepts and discards messages; every session runs in its own thread.
+    Counters (connections, messages, bytes, injected failures) are kept in
+    stats. Use as a context manager.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 command_latency: float = 0.0, tls: bool = True, certfile: str = None, keyfile: str = None,
+                 credentials: tuple = None, temp_fail_rate: float = 0.0, perm_fail_rate: float = 0.0,
+                 disconnect_rate: float = 0.0, seed: int = None):
+        """
+        Initialize the sink
+
+        Args:
+            host/port: Address to listen on (port 0 picks a free port)
+            latency: Seconds before a message is accepted after DATA
+            jitter: Extra random latency (0 to jitter seconds)
+            command_latency: Seconds before answering every command
+            tls: Offer STARTTLS (with a generated self-signed certificate
+                unless certfile/keyfile are given)
+            credentials: (user, password) required by AUTH; any login is accepted if None
+            temp_fail_rate: Fraction of messages answered 451 after DATA
+            perm_fail_rate: Fraction of recipients refused with 550
+            disconnect_rate: Fraction of transactions answered 421 and disconnected
+            seed: Random seed for latency jitter and failure injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.command_latency = command_latency
+        self.credentials = credentials
+        self.temp_fail_rate = temp_fail_rate
+        self.perm_fail_rate = perm_fail_rate
+        self.disconnect_rate = disconnect_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tempdir = None
+        self.tls_context = None
+        if tls:
+            if certfile is None:
+                self._tempdir = tempfile.TemporaryDirectory(prefix="smtp_sink_")
+                certfile, keyfile = generate_certificate(self._tempdir.name)
+            self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.tls_context.load_cert_chain(certfile, keyfile)
+        self.stats = {}
+        self.reset_stats()
+        self._server = _ThreadingSMTPServer((host, port), _SinkHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = dict.fromkeys(['connections', 'messages', 'message_bytes', 'bytes_received', 'bytes_sent',
+                                        'deferred', 'rejected', 'disconnects', 'auth_failures'], 0)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _roll(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def start(self) -> 'LocalSMTPServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="smtp-sink")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._tempdir:
+            self._tempdir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class TimedTransport(Transport):
+    """Transport wrapper that records the latency of every send (failed ones included)"""
+
+    def __init__(self, transport: Transport):
+        super().__init__()
+        self.transport = transport
+        self.action = transport.action
+        self.send_latencies = []
+
+    def send(self, message: OutgoingMessage):
+        start = time.perf_counter()
+        try:
+            return self.transport.send(message)
+        finally:
+            self.send_latencies.append(time.perf_counter() - start)
+
+    def set_concurrency(self, workers: int) -> int:
+        return self.transport.set_concurrency(workers)
+
+    def close(self):
+        self.transport.close()
+
+
+def run_scenario(sink: LocalSMTPServer, contacts, workers: int, use_tls: bool, credentials: Optional[tuple],
+                 attachments: List[str] = None, verbose: bool = False, retry_delay: float = 1.0) -> Dict:
+    """Run one campaign against the sink and collect client and server side numbers"""
+    user, password = credentials or ("loadtest@example.com", "loadtest")
+    bot = EmailCampaignBot(user, password, sink.host, sink.port, use_tls=use_tls)
+    bot.transport = timed = TimedTransport(bot.transport)
+    templates_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_networking.json")
+    sink.reset_stats()
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(sys.stdout if verbose else output):
+        bot.load_templates_from_file(templates_file)
+        stats = bot.run_campaign(
+            contacts=contacts,
+            global_vars=GLOBAL_VARS,
+            attachments_config={'common': attachments or [], 'by_language': {}},
+            send_limit=len(contacts),
+            max_workers=workers,
+            rate_limiter=RateLimiter(interval=0),
+            retry_policy=RetryPolicy(base_delay=retry_delay)
+        )
+    elapsed = time.perf_counter() - start
+    if 'error' in stats:
+        raise RuntimeError(stats['error'])
+
+    latencies = np.array(timed.send_latencies) * 1000
+    percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [None] * 3
+    server_stats = dict(sink.stats)
+    return {
+        'workers': workers,
+        'contacts': len(contacts),
+        'successful_sends': stats['successful_sends'],
+        'failed_sends': stats['failed_sends'],
+        'retries': stats['retries'],
+        'seconds': round(elapsed, 3),
+        'messages_per_sec': round(stats['successful_sends'] / elapsed, 2) if elapsed > 0 else None,
+        'latency_ms': {
+            'p50': round(float(percentiles[0]), 3) if len(latencies) else None,
+            'p95': round(float(percentiles[1]), 3) if len(latencies) else None,
+            'p99': round(float(percentiles[2]), 3) if len(latencies) else None,
+            'max': round(float(latencies.max()), 3) if len(latencies) else None
+        },
+        'connections': server_stats['connections'],
+        'bytes_on_wire': server_stats['bytes_received'] + server_stats['bytes_sent'],
+        'server': server_stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test run_campaign against a local SMTP sink")
+    parser.add_argument('--contacts', type=int, default=1000, help="Number of synthetic contacts")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help="max_workers values to run")
+    parser.add_argument('--latency', type=float, default=0.0, help="Server latency per message (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random server latency (seconds)")
+    parser.add_argument('--command-latency', type=float, default=0.0, help="Server latency per command (seconds)")
+    parser.add_argument('--no-tls', action='store_true', help="Do not offer STARTTLS")
+    parser.add_argument('--certfile', help="TLS certificate (a self-signed one is generated by default)")
+    parser.add_argument('--keyfile', help="TLS private key")
+    parser.add_argument('--user', help="Require AUTH with this user (any login is accepted otherwise)")
+    parser.add_argument('--password', default="loadtest", help="Password for --user")
+    parser.add_argument('--temp-fail-rate', type=float, default=0.0, help="Fraction of messages answered 451")
+    parser.add_argument('--perm-fail-rate', type=float, default=0.0, help="Fraction of recipients refused with 550")
+    parser.add_argument('--disconnect-rate', type=float, default=0.0,
+                        help="Fraction of transactions answered 421 and disconnected")
+    parser.add_argument('--retry-delay', type=float, default=1.0,
+                        help="Backoff before the first retry of a deferred send (seconds)")
+    parser.add_argument('--attachment-size', type=int, default=0, help="Attach a file of this many bytes (0 = none)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the sink")
+    parser.add_argument('--verbose', action='store_true', help="Show the campaign output")
+    parser.add_argument('--output', help="Write the results as JSON")
+    args = parser.parse_args()
+
+    credentials = (args.user, args.password) if args.user else None
+    contacts = generate_contacts(args.contacts)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as directory:
+        attachments = []
+        if args.attachment_size:
+            path = os.path.join(directory, "attachment.pdf")
+            with open(path, 'wb') as f:
+                f.write(np.random.default_rng(args.seed).bytes(args.attachment_size))
+            attachments.append(path)
+
+        with LocalSMTPServer(latency=args.latency, jitter=args.jitter, command_latency=args.command_latency,
+                             tls=not args.no_tls, certfile=args.certfile, keyfile=args.keyfile,
+                             credentials=credentials, temp_fail_rate=args.temp_fail_rate,
+                             perm_fail_rate=args.perm_fail_rate, disconnect_rate=args.disconnect_rate,
+                             seed=args.seed) as sink:
+            print(f"📡 SMTP sink listening on {sink.host}:{sink.port}")
+            for workers in args.workers:
+                result = run_scenario(sink, contacts, workers, not args.no_tls, credentials,
+                                      attachments, args.verbose, args.retry_delay)
+                results.append(result)
+                latency = result['latency_ms']
+                print(f"🚀 {workers} worker(s): {result['messages_per_sec']:,.1f} msg/s, "
+                      f"latency p50/p95/p99 {latency['p50']}/{latency['p95']}/{latency['p99']} ms, "
+                      f"{result['connections']} connection(s), {result['bytes_on_wire']:,} bytes, "
+                      f"{result['successful_sends']} sent / {result['failed_sends']} failed")
+
+    if args.output:
+        report = {
+            'created': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'settings': vars(args),
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,21 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import io
 
 # Import the EmailCampaignBot class
 try:
-    from email_campaign_bot import EmailCampaignBot
+    from email_campaign_bot import EmailCampaignBot, RateLimiter, SendJournal, SuppressionList, validate_contacts
+    from campaign_worker import get_job, start_job
 except ImportError as e:
     st.error(f"❌ Error importing EmailCampaignBot: {e}")
     st.stop()
 
 
+# Send journal used to resume campaigns across sessions
+JOURNAL_FILE = "campaign_journal.sqlite3"
+
 # Page configuration
 st.set_page_config(
     page_title="Email Campaign Manager",
@@ -70,6 +74,11 @@ def initialize_session_state():
         st.session_state.contacts_df = None
     if 'attachment_config' not in st.session_state:
         st.session_state.attachment_config = {'common': [], 'by_language': {}}
+    if 'campaign_job_id' not in st.session_state:
+        # The job id is kept in the URL so a refreshed page reattaches to its campaign
+        st.session_state.campaign_job_id = st.query_params.get('job')
+    if 'campaign_feed' not in st.session_state:
+        st.session_state.campaign_feed = None
 
 
 def validate_email_config(email, password, smtp_server, smtp_port):
@@ -156,6 +165,15 @@ def render_contacts_tab():
                     st.error(f"❌ Missing required columns: {missing_cols}")
                 else:
                     st.success("✅ All required columns present")
+                    
+                    # Address check: the campaign skips these rows before rendering
+                    _, rejected_df = validate_contacts(df)
+                    if len(rejected_df):
+                        reasons = rejected_df['reason'].value_counts()
+                        st.warning("⚠️ These contacts will be skipped: " +
+                                   ", ".join(f"{count} {reason}" for reason, count in reasons.items()))
+                        with st.expander("🚫 Rejected Contacts"):
+                            st.dataframe(rejected_df, use_container_width=True)
                 
                 # Show available columns
                 st.info(f"Available columns: {', '.join(df.columns.tolist())}")
@@ -467,134 +485,134 @@ def render_campaign_preview(global_vars, campaign_mode, selected_language=None,
                         st.error(f"❌ No template available for language: {lang}")
 
 
-def run_single_language_campaign(selected_language, global_vars, send_limit, delay_min, delay_max, test_mode):
+def run_single_language_campaign(bot, contacts_df, attachment_config, selected_language, global_vars, campaign_options):
     """Run a single language campaign"""
-    contacts_with_language = st.session_state.contacts_df.copy()
-    contacts_with_language['language'] = selected_language
-    
-    # Save contacts to temporary file
-    temp_contacts_file = f"temp_contacts_{selected_language}.xlsx"
-    contacts_with_language.to_excel(temp_contacts_file, index=False)
-    
-    # Progress tracking
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text(f"🚀 Starting {selected_language.upper()} campaign...")
+    campaign_stats = bot.run_campaign(
+        contacts=contacts_df.assign(language=selected_language),
+        global_vars=global_vars,
+        attachments_config=attachment_config,
+        **campaign_options,
+        default_language=selected_language
+    )
     
-    try:
-        campaign_stats = st.session_state.bot.run_campaign(
-            contacts_file=temp_contacts_file,
-            global_vars=global_vars,
-            attachments_config=st.session_state.attachment_config,
-            send_limit=send_limit,
-            delay_min=delay_min,
-            delay_max=delay_max,
-            test_mode=test_mode,
-            default_language=selected_language
-        )
-        
-        campaign_stats['language'] = selected_language
-        progress_bar.progress(1.0)
-        status_text.text("✅ Campaign completed!")
-        return [campaign_stats]
-        
-    except Exception as e:
-        st.error(f"❌ Campaign failed: {str(e)}")
-        return []
-    finally:
-        if os.path.exists(temp_contacts_file):
-            os.remove(temp_contacts_file)
+    campaign_stats['language'] = selected_language
+    return [campaign_stats]
 
 
-def run_multi_language_campaign(selected_languages, global_vars, send_limit, delay_min, delay_max, test_mode):
+def run_multi_language_campaign(bot, contacts_df, attachment_config, selected_languages, global_vars, campaign_options):
     """Run multi-language campaigns"""
-    if not selected_languages:
-        st.error("❌ Please select at least one language")
-        return []
+    # One pass over the contacts for all languages: connections, attachments
+    # and the sending rate are shared between them
+    campaign_stats = bot.run_campaign(
+        contacts=contacts_df,
+        global_vars=global_vars,
+        attachments_config=attachment_config,
+        **campaign_options,
+        languages=selected_languages
+    )
+    
+    if 'error' in campaign_stats:
+        raise RuntimeError(campaign_stats['error'])
     
+    # Split the combined result into per-language results for the Results tab
     campaign_results = []
-    total_languages = len(selected_languages)
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for idx, lang in enumerate(selected_languages):
-        if lang not in st.session_state.bot.templates:
-            st.warning(f"⚠️ Skipping {lang.upper()} - no template available")
-            continue
-        
-        status_text.text(f"🚀 Starting {lang.upper()} campaign ({idx+1}/{total_languages})...")
-        progress_bar.progress(idx / total_languages)
-        
-        # Prepare contacts for this language
-        contacts_with_language = st.session_state.contacts_df.copy()
-        contacts_with_language['language'] = lang
-        
-        # Save to temporary file
-        temp_contacts_file = f"temp_contacts_{lang}.xlsx"
-        contacts_with_language.to_excel(temp_contacts_file, index=False)
-        
-        try:
-            campaign_stats = st.session_state.bot.run_campaign(
-                contacts_file=temp_contacts_file,
-                global_vars=global_vars,
-                attachments_config=st.session_state.attachment_config,
-                send_limit=send_limit,
-                delay_min=delay_min,
-                delay_max=delay_max,
-                test_mode=test_mode,
-                default_language=lang
-            )
-            
-            campaign_stats['language'] = lang
-            campaign_results.append(campaign_stats)
-            
-        except Exception as e:
-            st.error(f"❌ {lang.upper()} campaign failed: {str(e)}")
-        finally:
-            if os.path.exists(temp_contacts_file):
-                os.remove(temp_contacts_file)
-        
-        # Update progress
-        progress_bar.progress((idx + 1) / total_languages)
+    for lang in campaign_stats['target_languages']:
+        lang_stats = campaign_stats['language_statistics'].get(lang, {})
+        campaign_results.append({
+            **campaign_stats,
+            'language': lang,
+            'successful_sends': lang_stats.get('successful', 0),
+            'failed_sends': lang_stats.get('failed', 0),
+            'log_language': lang
+        })
     
     return campaign_results
 
 
-def run_auto_detect_campaign(global_vars, send_limit, delay_min, delay_max, test_mode):
+def run_auto_detect_campaign(bot, contacts_df, attachment_config, global_vars, campaign_options):
     """Run auto-detect language campaign"""
-    temp_contacts_file = "temp_contacts_auto.xlsx"
-    st.session_state.contacts_df.to_excel(temp_contacts_file, index=False)
+    campaign_stats = bot.run_campaign(
+        contacts=contacts_df,
+        global_vars=global_vars,
+        attachments_config=attachment_config,
+        **campaign_options,
+        default_language="en"
+    )
+    
+    campaign_stats['language'] = 'auto-detect'
+    return [campaign_stats]
+
+
+def build_suppression_list(uploaded_files, suppress_contacted):
+    """Suppression list from the uploaded files and, optionally, the send journal (None if empty)"""
+    if not uploaded_files and not suppress_contacted:
+        return None
+    
+    suppression = SuppressionList()
+    for uploaded_file in uploaded_files or []:
+        uploaded_file.seek(0)
+        if uploaded_file.name.endswith('.csv'):
+            df = pd.read_csv(uploaded_file, dtype=str)
+        else:
+            df = pd.read_csv(uploaded_file, header=None, names=['email'], dtype=str, comment='#')
+        suppression.add(df['email'] if 'email' in df.columns else df.iloc[:, 0])
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text("🚀 Starting auto-detect campaign...")
+    if suppress_contacted and os.path.exists(JOURNAL_FILE):
+        suppression.load_journal(JOURNAL_FILE)
     
+    return suppression
+
+
+def seed_daily_quota(rate_limiter):
+    """Count the last 24 hours of journaled deliveries against the limiter's daily cap"""
+    if not rate_limiter.per_day or not os.path.exists(JOURNAL_FILE):
+        return
+    journal = SendJournal(JOURNAL_FILE)
     try:
-        campaign_stats = st.session_state.bot.run_campaign(
-            contacts_file=temp_contacts_file,
-            global_vars=global_vars,
-            attachments_config=st.session_state.attachment_config,
-            send_limit=send_limit,
-            delay_min=delay_min,
-            delay_max=delay_max,
-            test_mode=test_mode,
-            default_language="en"
-        )
-        
-        campaign_stats['language'] = 'auto-detect'
-        progress_bar.progress(1.0)
-        status_text.text("✅ Campaign completed!")
-        return [campaign_stats]
-        
-    except Exception as e:
-        st.error(f"❌ Campaign failed: {str(e)}")
-        return []
+        rate_limiter.preload(journal.delivered_since(datetime.now() - timedelta(days=1)))
     finally:
-        if os.path.exists(temp_contacts_file):
-            os.remove(temp_contacts_file)
+        journal.close()
 
 
-def render_campaign_tab(send_limit, delay_min, delay_max, test_mode):
+def launch_campaign(campaign_mode, selected_language, selected_languages, global_vars, campaign_options):
+    """Start the campaign in a background job and return it"""
+    # The worker thread has no Streamlit session: hand it everything it needs now
+    bot = st.session_state.bot
+    contacts_df = st.session_state.contacts_df
+    attachment_config = st.session_state.attachment_config
+    
+    if campaign_mode == "Single Language":
+        description = f"{selected_language.upper()} campaign"
+        target = 1
+        run = lambda options: run_single_language_campaign(
+            bot, contacts_df, attachment_config, selected_language, global_vars, options
+        )
+    elif campaign_mode == "Multi-Language":
+        description = f"{', '.join(lang.upper() for lang in selected_languages)} campaign"
+        target = len(selected_languages)
+        run = lambda options: run_multi_language_campaign(
+            bot, contacts_df, attachment_config, selected_languages, global_vars, options
+        )
+    else:  # Auto-Detect
+        description = "Auto-detect campaign"
+        target = 1
+        run = lambda options: run_auto_detect_campaign(
+            bot, contacts_df, attachment_config, global_vars, options
+        )
+    
+    # Expected sends: send_limit per language, at most one per contact and language
+    target *= min(campaign_options['send_limit'], len(contacts_df))
+    
+    def work(control, on_progress):
+        options = dict(campaign_options, control=control, on_progress=on_progress)
+        options['suppression'] = build_suppression_list(*options['suppression'])
+        seed_daily_quota(options['rate_limiter'])
+        return run(options)
+    
+    return start_job(work, description, target=target)
+
+
+def render_campaign_tab(campaign_options):
     """Render the campaign launch tab"""
     st.header("🚀 Campaign Launch")
     
@@ -700,7 +718,7 @@ def render_campaign_tab(send_limit, delay_min, delay_max, test_mode):
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        if test_mode:
+        if campaign_options['test_mode']:
             st.info("🧪 **Test Mode Enabled** - No emails will actually be sent")
         else:
             st.warning("⚠️ **Live Mode** - Emails will be sent to recipients")
@@ -713,42 +731,130 @@ def render_campaign_tab(send_limit, delay_min, delay_max, test_mode):
         )
     
     if launch_button:
-        if not st.session_state.contacts_df.empty:
-            # Launch campaign based on selected mode
-            if campaign_mode == "Single Language":
-                campaign_results = run_single_language_campaign(
-                    selected_language, global_vars, send_limit, delay_min, delay_max, test_mode
-                )
-            elif campaign_mode == "Multi-Language":
-                campaign_results = run_multi_language_campaign(
-                    selected_languages, global_vars, send_limit, delay_min, delay_max, test_mode
-                )
-            else:  # Auto-Detect
-                campaign_results = run_auto_detect_campaign(
-                    global_vars, send_limit, delay_min, delay_max, test_mode
-                )
-            
-            # Show results
-            if campaign_results:
-                # Store results
-                st.session_state.campaign_stats = campaign_results
-                
-                # Show summary
-                total_successful = sum(stats.get('successful_sends', 0) for stats in campaign_results if 'error' not in stats)
-                total_failed = sum(stats.get('failed_sends', 0) for stats in campaign_results if 'error' not in stats)
-                
-                if total_successful > 0:
-                    st.success(f"✅ All campaigns completed! {total_successful} emails sent successfully across {len(campaign_results)} campaign(s).")
-                if total_failed > 0:
-                    st.warning(f"⚠️ {total_failed} emails failed to send.")
-                
-                # Show per-language results
-                for stats in campaign_results:
-                    if 'error' not in stats:
-                        lang_name = stats.get('language', 'Unknown').upper()
-                        st.info(f"**{lang_name}**: {stats['successful_sends']} sent, {stats['failed_sends']} failed")
-        else:
+        active_job = get_job(st.session_state.campaign_job_id) if st.session_state.campaign_job_id else None
+        if active_job and not active_job.done:
+            st.warning("⚠️ A campaign is already running - pause or cancel it below")
+        elif st.session_state.contacts_df.empty:
             st.error("❌ No contacts available")
+        elif campaign_mode == "Multi-Language" and not selected_languages:
+            st.error("❌ Please select at least one language")
+        else:
+            if campaign_mode == "Multi-Language":
+                for lang in selected_languages:
+                    if lang not in st.session_state.bot.templates:
+                        st.warning(f"⚠️ Skipping {lang.upper()} - no template available")
+                selected_languages = [lang for lang in selected_languages if lang in st.session_state.bot.templates]
+            
+            if campaign_mode != "Multi-Language" or selected_languages:
+                job = launch_campaign(campaign_mode, selected_language, selected_languages, global_vars, campaign_options)
+                st.session_state.campaign_job_id = job.job_id
+                st.session_state.campaign_feed = None
+                st.query_params['job'] = job.job_id
+    
+    render_campaign_monitor()
+
+
+@st.fragment(run_every=2)
+def render_campaign_monitor():
+    """Live progress and controls for the background campaign job"""
+    job_id = st.session_state.campaign_job_id
+    job = get_job(job_id) if job_id else None
+    if job is None:
+        if job_id:
+            st.info("ℹ️ The previous campaign is no longer available (the app was restarted or the job expired)")
+            st.session_state.campaign_job_id = None
+        return
+    
+    # Progress events since the last poll; a new session (page refresh) starts
+    # from the job's snapshot instead
+    events = job.events()
+    snapshot = job.snapshot()
+    if st.session_state.campaign_feed is None:
+        st.session_state.campaign_feed = snapshot['recent']
+    else:
+        st.session_state.campaign_feed.extend(event for event in events if event['event'] == 'delivery')
+        del st.session_state.campaign_feed[:-50]
+    
+    st.subheader(f"📡 {snapshot['description']}")
+    
+    state_labels = {
+        'running': "🚀 Running",
+        'paused': "⏸️ Paused",
+        'completed': "✅ Completed",
+        'cancelled': "🛑 Cancelled",
+        'failed': "❌ Failed"
+    }
+    counts = snapshot['counts']
+    sent = counts.get('success', 0) + counts.get('test_success', 0)
+    failed = counts.get('failed', 0)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Status", state_labels.get(snapshot['state'], snapshot['state']))
+    with col2:
+        st.metric("Sent", sent)
+    with col3:
+        st.metric("Failed", failed)
+    
+    if snapshot['target']:
+        st.progress(min(sent / snapshot['target'], 1.0), text=f"{sent}/{snapshot['target']} emails")
+    
+    if not job.done:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if snapshot['state'] == 'paused':
+                if st.button("▶️ Resume", use_container_width=True):
+                    job.resume()
+            elif st.button("⏸️ Pause", use_container_width=True):
+                job.pause()
+        with col2:
+            if st.button("🛑 Cancel", use_container_width=True):
+                job.cancel()
+        with col3:
+            st.caption(f"Job {job.job_id} - started {snapshot['started_at'][:19]}")
+    
+    if st.session_state.campaign_feed:
+        with st.expander("📋 Latest Sends", expanded=not job.done):
+            st.dataframe(pd.DataFrame(st.session_state.campaign_feed[::-1])[['time', 'name', 'email', 'language', 'status']],
+                         use_container_width=True)
+    
+    if not job.done:
+        return
+    
+    if snapshot['error']:
+        st.error(f"❌ Campaign failed: {snapshot['error']}")
+    elif job.result:
+        campaign_results = job.result
+        
+        # Hand the results to the Results tab once, then refresh the whole page
+        if st.session_state.campaign_stats is not campaign_results:
+            st.session_state.campaign_stats = campaign_results
+            st.rerun()
+        
+        total_successful = sum(stats.get('successful_sends', 0) for stats in campaign_results if 'error' not in stats)
+        total_failed = sum(stats.get('failed_sends', 0) for stats in campaign_results if 'error' not in stats)
+        
+        if total_successful > 0:
+            st.success(f"✅ All campaigns completed! {total_successful} emails sent successfully across {len(campaign_results)} campaign(s).")
+        if total_failed > 0:
+            st.warning(f"⚠️ {total_failed} emails failed to send.")
+        
+        # Show per-language results
+        for stats in campaign_results:
+            if 'error' not in stats:
+                lang_name = stats.get('language', 'Unknown').upper()
+                st.info(f"**{lang_name}**: {stats['successful_sends']} sent, {stats['failed_sends']} failed")
+            else:
+                st.error(f"❌ Campaign failed: {stats['error']}")
+
+
+def campaign_log_frame(stats):
+    """Read a campaign's log back as a DataFrame (only when it is displayed or exported)"""
+    campaign_log = stats.get('campaign_log')
+    if not campaign_log:
+        return pd.DataFrame()
+    # Multi-language results share one log, each showing its own language
+    return campaign_log.to_frame(language=stats.get('log_language'))
 
 
 def render_results_tab():
@@ -825,6 +931,23 @@ def render_multi_campaign_results():
     # Combined campaign log
     render_combined_campaign_log(all_stats)
     
+    # Contacts dropped by address validation (the same rows for every language)
+    rejected = [stats['rejected_contacts'] for stats in all_stats if stats.get('rejected_contacts') is not None]
+    if rejected and len(rejected[0]):
+        with st.expander(f"🚫 Rejected Contacts ({len(rejected[0])})"):
+            st.dataframe(rejected[0], use_container_width=True)
+            st.download_button(
+                label="📥 Download Rejected Contacts",
+                data=rejected[0].to_csv(index=False),
+                file_name=f"rejected_contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv"
+            )
+    
+    # Profiling report (multi-language results share the run's report)
+    profiled = [stats for stats in all_stats if stats.get('profile')]
+    if profiled:
+        render_profile_report(profiled[0]['profile'])
+    
     # Export options
     render_export_options()
 
@@ -853,7 +976,7 @@ def render_single_campaign_results():
     if 'campaign_log' in stats and stats['campaign_log']:
         st.subheader("📋 Detailed Log")
         
-        log_df = pd.DataFrame(stats['campaign_log'])
+        log_df = campaign_log_frame(stats)
         
         # Add filters
         col1, col2 = st.columns(2)
@@ -893,6 +1016,35 @@ def render_single_campaign_results():
             file_name=f"campaign_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv"
         )
+    
+    if stats.get('profile'):
+        render_profile_report(stats['profile'])
+
+
+def render_profile_report(report):
+    """Top functions by cumulative time and top allocation sites of a profiled run"""
+    st.subheader("🔬 Profile")
+    st.caption(f"Peak traced memory: {report['peak_memory_bytes'] / 1024 / 1024:.1f} MB - "
+               f"full profile in {report['profile_file']}, allocations in {report['allocations_file']}")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Top functions (cumulative time)**")
+        st.dataframe(pd.DataFrame(report['top_functions']), use_container_width=True)
+    
+    with col2:
+        st.markdown("**Top allocations (held at end of run)**")
+        st.dataframe(pd.DataFrame(report['top_allocations']), use_container_width=True)
+    
+    if os.path.exists(report['profile_file']):
+        with open(report['profile_file'], 'rb') as f:
+            st.download_button(
+                label="📥 Download .prof",
+                data=f.read(),
+                file_name=os.path.basename(report['profile_file']),
+                mime="application/octet-stream"
+            )
 
 
 def render_combined_campaign_log(all_stats):
@@ -903,12 +1055,10 @@ def render_combined_campaign_log(all_stats):
     for stats in all_stats:
         if 'campaign_log' in stats and stats['campaign_log']:
             # Add language info to each log entry
-            for log_entry in stats['campaign_log']:
-                log_entry['campaign_language'] = stats.get('language', 'Unknown')
-                all_logs.append(log_entry)
+            all_logs.append(campaign_log_frame(stats).assign(campaign_language=stats.get('language', 'Unknown')))
     
     if all_logs:
-        combined_log_df = pd.DataFrame(all_logs)
+        combined_log_df = pd.concat(all_logs, ignore_index=True)
         
         # Add filters
         col1, col2, col3 = st.columns(3)
@@ -1029,20 +1179,17 @@ def render_export_options():
                 all_logs = []
                 for stats in st.session_state.campaign_stats:
                     if 'campaign_log' in stats and stats['campaign_log']:
-                        for log_entry in stats['campaign_log']:
-                            log_entry_copy = log_entry.copy()
-                            log_entry_copy['campaign_language'] = stats.get('language', 'Unknown')
-                            all_logs.append(log_entry_copy)
+                        all_logs.append(campaign_log_frame(stats).assign(campaign_language=stats.get('language', 'Unknown')))
                 
                 if all_logs:
-                    detailed_df = pd.DataFrame(all_logs)
+                    detailed_df = pd.concat(all_logs, ignore_index=True)
                 else:
                     detailed_df = pd.DataFrame()
             else:
                 # Single campaign log
                 stats = st.session_state.campaign_stats
                 if 'campaign_log' in stats and stats['campaign_log']:
-                    detailed_df = pd.DataFrame(stats['campaign_log'])
+                    detailed_df = campaign_log_frame(stats)
                     detailed_df['campaign_language'] = stats.get('language', 'auto-detect')
                 else:
                     detailed_df = pd.DataFrame()
@@ -1096,7 +1243,49 @@ def main():
             send_limit = st.number_input("Send Limit per Session", value=5, min_value=1, max_value=100)
             delay_min = st.number_input("Min Delay (seconds)", value=30, min_value=0)
             delay_max = st.number_input("Max Delay (seconds)", value=60, min_value=delay_min)
+            daily_cap = st.number_input("Max Emails per Day", value=0, min_value=0,
+                                        help="Provider's daily sending quota over a rolling 24 hours (0 = no daily cap). "
+                                             "Sends of earlier campaigns count when they were run with a Campaign ID")
+            max_workers = st.number_input("Concurrent Workers", value=1, min_value=1, max_value=10,
+                                          help="Number of parallel SMTP sessions (1 = send one email at a time)")
+            build_workers = st.number_input("Message Builder Processes", value=0, min_value=0, max_value=os.cpu_count() or 1,
+                                            help="Build emails and encode attachments on several CPU cores ahead of sending; "
+                                                 "useful with per-contact or large attachments (0 = build while sending)")
             test_mode = st.checkbox("🧪 Test Mode (don't send emails)", value=True)
+            broadcast = st.checkbox("📢 Broadcast Mode",
+                                    help="For announcements without per-contact placeholders: one email per batch of recipients (BCC)")
+            profile = st.checkbox("🔬 Profile Run",
+                                  help="Record CPU time per function and memory allocations (slows the run down); shown in the Results tab")
+            campaign_id = st.text_input("Campaign ID",
+                                        help="Recipients already sent to under this ID are skipped, so a campaign can be resumed across sessions")
+
+        # One rate limiter per launch, so multi-language runs share the pacing budget
+        campaign_options = {
+            'send_limit': send_limit,
+            'delay_min': delay_min,
+            'delay_max': delay_max,
+            'test_mode': test_mode,
+            'max_workers': max_workers,
+            'build_workers': build_workers,
+            'broadcast': broadcast,
+            'profile': profile,
+            'rate_limiter': RateLimiter.from_delays(delay_min, delay_max, per_day=daily_cap or None)
+        }
+        if campaign_id.strip():
+            campaign_options['journal'] = JOURNAL_FILE
+            campaign_options['campaign_id'] = campaign_id.strip()
+        
+        # Suppression list
+        with st.expander("🚫 Suppression List"):
+            suppression_files = st.file_uploader(
+                "Unsubscribes / Bounces",
+                type=['csv', 'txt'],
+                accept_multiple_files=True,
+                help="CSV with an 'email' column (or addresses in the first column), or text with one address per line"
+            )
+            suppress_contacted = st.checkbox("Skip anyone contacted by earlier campaigns",
+                                             help="Every recipient delivered to in the send journal, under any Campaign ID")
+        campaign_options['suppression'] = (suppression_files, suppress_contacted)
 
     # Main content area
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["Contacts", "Templates", "Attachments", "Campaign", "Results"])
@@ -1111,7 +1300,7 @@ def main():
         render_attachments_tab()
     
     with tab4:
-        render_campaign_tab(send_limit, delay_min, delay_max, test_mode)
+        render_campaign_tab(campaign_options)
     
     with tab5:
         render_results_tab()